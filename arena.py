@@ -0,0 +1,92 @@
+import argparse, json, random, sys, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from player import *
+
+
+PLAYER_TYPES: dict[str, type[Player]] = {
+    'random': AI_Random_Player,
+    'minmax': AI_Minmax_Player,
+    'graph': AI_Minmax_Graph_Player,
+    'mcts': AI_MCTS_Player,
+}
+'''AI players that can take part in arena games, by the name used on the command line'''
+
+
+def play_game(board_size: int, player_1_type: str, player_2_type: str, seed: int) -> dict:
+    """
+    Play one game between two AI players without a display
+
+    Return the winner, the moves played and the time every move took
+    """
+    random.seed(seed)
+    board = Board(board_size)
+    players = [PLAYER_TYPES[player_1_type](PLAYER_1_TOKEN, board=board),
+               PLAYER_TYPES[player_2_type](PLAYER_2_TOKEN, board=board)]
+    moves: list[tuple[int, int]] = list()
+    move_times: list[float] = list()
+    player_turn = 0
+    while board.get_win_token() is None:
+        start = time.perf_counter()
+        tile_pos = players[player_turn].get_move()
+        move_times.append(time.perf_counter() - start)
+        board.make_move(tile_pos, players[player_turn].token)
+        moves.append(tile_pos)
+        player_turn = 1 - player_turn
+    for player in players:
+        player.close()
+    return {
+        'board_size': board_size,
+        'seed': seed,
+        'player_1': player_1_type,
+        'player_2': player_2_type,
+        'winner': board.get_win_token(),
+        'moves': moves,
+        'move_times': move_times,
+    }
+
+
+def run_arena(board_size: int, player_1_type: str, player_2_type: str, num_games: int, num_workers: int,
+              output_file, seed: int = 0, swap_sides: bool = False) -> dict[str, int]:
+    """
+    Play num_games games over num_workers processes, writing every result to output_file as a JSON line when it ends
+
+    With swap_sides the two players change sides every other game. Return the number of wins of each player type
+    """
+    wins = {player_1_type: 0, player_2_type: 0}
+    with ProcessPoolExecutor(num_workers) as executor:
+        futures = list()
+        for game in range(num_games):
+            players = (player_2_type, player_1_type) if swap_sides and game % 2 == 1 else (player_1_type, player_2_type)
+            futures.append(executor.submit(play_game, board_size, *players, seed + game))
+        for future in as_completed(futures):
+            result = future.result()
+            wins[result['player_1'] if result['winner'] == PLAYER_1_TOKEN else result['player_2']] += 1
+            output_file.write(json.dumps(result) + '\n')
+            output_file.flush()
+    return wins
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Play games between AI players without a display')
+    parser.add_argument('player_1', choices=PLAYER_TYPES, help='player connecting the left and right borders')
+    parser.add_argument('player_2', choices=PLAYER_TYPES, help='player connecting the top and bottom borders')
+    parser.add_argument('--board-size', type=int, default=5)
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first game, the next games use the next seeds')
+    parser.add_argument('--swap-sides', action='store_true', help='let the players change sides every other game')
+    parser.add_argument('--output', help='JSON lines file for the game results, standard output by default')
+    args = parser.parse_args()
+
+    output_file = open(args.output, 'w') if args.output is not None else sys.stdout
+    try:
+        wins = run_arena(args.board_size, args.player_1, args.player_2, args.games, args.workers, output_file,
+                         args.seed, args.swap_sides)
+    finally:
+        if output_file is not sys.stdout:
+            output_file.close()
+    print(', '.join(f'{player_type}: {num_wins} wins' for player_type, num_wins in wins.items()), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
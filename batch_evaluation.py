@@ -0,0 +1,152 @@
+import numpy
+from collections import deque
+from board import *
+
+
+UNREACHABLE = 1 << 20
+'''Distance used for tiles that can't be reached, larger than any path on the board'''
+
+
+def get_children_boards(board: Board, moves: list[tuple[int, int]], player_token: int) -> numpy.ndarray:
+    """
+    Get a stack of copies of the board, each with one of the moves played by player
+    """
+    children = numpy.repeat(board.board[numpy.newaxis], len(moves), axis=0)
+    rows, columns = zip(*moves)
+    children[numpy.arange(len(moves)), rows, columns] = player_token
+    return children
+
+
+def get_batch_distances(children: numpy.ndarray, player_token: int) -> numpy.ndarray:
+    """
+    Get AI_Minmax_Graph_Player.dijkstra from the player's first border to its second border for every board in the stack
+
+    Distances are relaxed for all boards at once until none changes; as in the board graph, entering a tile costs 1
+    when it is empty or when it is entered from the first border, and 0 when it holds the player's token
+    """
+    num_children, board_size = children.shape[0], children.shape[1]
+    if player_token == PLAYER_2_TOKEN:  # player 2 connects rows, transpose so that it connects columns as well
+        children = children.transpose(0, 2, 1)
+    tiles = children.reshape(num_children, -1)
+    opponent_token = 1 if player_token == 2 else 2
+    costs = numpy.where(tiles == player_token, 0, numpy.where(tiles == opponent_token, UNREACHABLE, 1)).astype(numpy.int32)
+    # Tile (i, j) of the transposed board is tile (j, i) of the board, whose neighbours are the same tiles transposed
+    neighbour_indices = get_board_geometry(board_size).neighbour_indices
+
+    distances = numpy.full((num_children, tiles.shape[1] + 1), UNREACHABLE, dtype=numpy.int32)
+    first_column = numpy.arange(0, board_size * board_size, board_size)
+    distances[:, first_column] = numpy.where(costs[:, first_column] == UNREACHABLE, UNREACHABLE, 1)
+    while True:
+        relaxed = numpy.minimum(distances[:, neighbour_indices].min(axis=2) + costs, UNREACHABLE)
+        relaxed = numpy.minimum(relaxed, distances[:, :-1])
+        if numpy.array_equal(relaxed, distances[:, :-1]):
+            break
+        distances[:, :-1] = relaxed
+    shortest = distances[:, first_column + board_size - 1].min(axis=1).astype(float)
+    shortest[shortest >= UNREACHABLE] = float('inf')
+    return shortest
+
+
+def get_distance_fields(board: Board, tiles: list[int], player_token: int) -> tuple[list[float], list[float]]:
+    """
+    Get for every tile the distance from the first column to the tile, cost of the tile included, and the distance
+    from the tile to the last column, cost of the tile excluded
+
+    tiles is the flat board, transposed for player 2 so that both players connect the first column to the last one
+    """
+    board_size = board.board_size
+    num_tiles = board_size * board_size
+    neighbours = board.geometry.tile_neighbours
+    opponent_token = 1 if player_token == 2 else 2
+    costs = [0 if token == player_token else 1 for token in tiles]
+
+    # Both fields are computed with a 0-1 BFS, the cost of an edge being the cost of the tile it enters
+    forward = [float('inf')] * num_tiles
+    queue = deque()
+    for tile in range(0, num_tiles, board_size):
+        if tiles[tile] != opponent_token:
+            forward[tile] = 1
+            queue.append(tile)
+    while len(queue) > 0:
+        tile = queue.popleft()
+        for neighbour in neighbours[tile]:
+            if tiles[neighbour] != opponent_token and forward[tile] + costs[neighbour] < forward[neighbour]:
+                forward[neighbour] = forward[tile] + costs[neighbour]
+                queue.appendleft(neighbour) if costs[neighbour] == 0 else queue.append(neighbour)
+
+    backward = [float('inf')] * num_tiles
+    for tile in range(board_size - 1, num_tiles, board_size):
+        if tiles[tile] != opponent_token:
+            backward[tile] = 0
+            queue.append(tile)
+    while len(queue) > 0:
+        tile = queue.popleft()
+        for neighbour in neighbours[tile]:
+            if tiles[neighbour] != opponent_token and backward[tile] + costs[tile] < backward[neighbour]:
+                backward[neighbour] = backward[tile] + costs[tile]
+                queue.appendleft(neighbour) if costs[tile] == 0 else queue.append(neighbour)
+    return forward, backward
+
+
+def get_children_distances(board: Board, moves: list[tuple[int, int]], mover_token: int,
+                           player_token: int) -> numpy.ndarray:
+    """
+    Get AI_Minmax_Graph_Player.dijkstra for player in every position reached by one of the moves played by mover
+
+    The distances are derived from the distance fields of the parent position: a move of the player shortens the paths
+    through its tile, a move of the opponent only matters when its tile is on a shortest path, and those children are
+    solved together with get_batch_distances
+    """
+    board_size = board.board_size
+    tiles = board.board if player_token == PLAYER_1_TOKEN else board.board.T
+    forward, backward = get_distance_fields(board, tiles.ravel().tolist(), player_token)
+    shortest = min(forward[board_size - 1::board_size])
+
+    rows, columns = numpy.array(moves).T
+    if player_token == PLAYER_2_TOKEN:
+        rows, columns = columns, rows
+    move_tiles = rows * board_size + columns
+    through = numpy.array(forward)[move_tiles] + numpy.array(backward)[move_tiles]
+    if mover_token == player_token:
+        # Entering the tile becomes free, except from the first border whose edges always cost 1
+        return numpy.minimum(shortest, through - (columns != 0))
+
+    distances = numpy.full(len(moves), shortest, dtype=float)
+    blocked = numpy.flatnonzero(through <= shortest) if shortest != float('inf') else []
+    if len(blocked) > 0:
+        distances[blocked] = get_batch_distances(get_children_boards(board, [moves[i] for i in blocked], mover_token), player_token)
+    return distances
+
+
+def get_batch_bridge_rewards(board: Board, children: numpy.ndarray, player_token: int) -> numpy.ndarray:
+    """
+    Get Board.get_bridge_reward for every board in the stack
+    """
+    num_children, board_size = children.shape[0], children.shape[1]
+    padded_boards = numpy.full((num_children, board_size + 4, board_size + 4), OFF_BOARD, dtype=children.dtype)
+    padded_boards[:, 2:board_size + 2, 2:board_size + 2] = children
+    gathered = padded_boards.reshape(num_children, -1)[:, board.bridge_indices]
+    first_carriers, second_carriers, targets = gathered[:, 0], gathered[:, 1], gathered[:, 2]
+    own_tiles = children == player_token
+    open_bridges = own_tiles[:, numpy.newaxis] & (first_carriers == UNOCCUPIED) & (second_carriers == UNOCCUPIED)
+    rewards = 0.25 * numpy.count_nonzero(open_bridges, axis=(1, 2, 3)) + \
+        0.25 * numpy.count_nonzero(open_bridges & (targets == player_token), axis=(1, 2, 3)) + \
+        numpy.count_nonzero(open_bridges & (targets == OFF_BOARD), axis=(2, 3)) @ board.bridge_border_rewards[player_token - 1]
+    num_tiles = numpy.count_nonzero(own_tiles, axis=(1, 2))
+    return numpy.where(num_tiles > 0, rewards / numpy.maximum(num_tiles, 1), 0)
+
+
+def evaluate_children(board: Board, moves: list[tuple[int, int]], mover_token: int, player_token: int,
+                      num_turns: int) -> numpy.ndarray:
+    """
+    Get the leaf score for player of every position reached from the board by one of the moves played by mover
+
+    The score is AI_Minmax_Graph_Player.evaluate_score plus the bridge reward difference when the evaluation is above 1
+    """
+    opponent_token = 1 if player_token == 2 else 2
+    children = get_children_boards(board, moves, mover_token)
+    with numpy.errstate(invalid='ignore'):  # both players blocked gives inf - inf, as in the scalar evaluation
+        evaluations = get_children_distances(board, moves, mover_token, opponent_token) - \
+            get_children_distances(board, moves, mover_token, player_token) - num_turns
+        return numpy.where(evaluations > 1, evaluations + get_batch_bridge_rewards(board, children, player_token)
+                           - get_batch_bridge_rewards(board, children, opponent_token), evaluations)
@@ -0,0 +1,207 @@
+import argparse, json, random, sys, time
+from player import *
+
+
+BOARD_SIZES = (5, 7, 9, 11, 13)
+NUM_GAMES = 4
+'''Number of seeded games the positions of every board size are taken from'''
+SEARCH_DEPTHS = {5: 3, 7: 3, 9: 2, 11: 2, 13: 2}
+'''Deepest search timed for every board size, deeper searches of the bigger boards take minutes'''
+SEARCH_PLAYERS = (
+    (AI_Minmax_Player, dict()),
+    (AI_Minmax_Graph_Player, dict(use_opening_book=False, pondering=False, solver_empty_tiles=None)),
+)
+'''Players whose searches are timed, with the options leaving out everything but the minimax search'''
+
+
+def create_games(board_size: int, seed: int, games_file: str | None = None) -> list[list[tuple[int, int]]]:
+    """
+    Get the move lists of the games the benchmark positions are taken from
+
+    The games of the given arena results file are used when it has games of that size, otherwise games are played
+    with random moves from the seed
+    """
+    if games_file is not None:
+        with open(games_file) as results:
+            games = [[tuple(move) for move in game['moves']] for game in map(json.loads, results)
+                     if game['board_size'] == board_size]
+        if len(games) > 0:
+            return games[:NUM_GAMES]
+    generator = random.Random(seed * 100 + board_size)
+    games = list()
+    for _ in range(NUM_GAMES):
+        board = Board(board_size)
+        moves: list[tuple[int, int]] = list()
+        while board.get_win_token() is None:
+            tiles = board.get_unoccupied_tiles()
+            moves.append(tiles[generator.randrange(len(tiles))])
+            board.make_move(moves[-1], PLAYER_1_TOKEN if len(moves) % 2 == 1 else PLAYER_2_TOKEN)
+        games.append(moves)
+    return games
+
+
+def get_positions(board_size: int, games: list[list[tuple[int, int]]], fractions: list[float]) -> list[Board]:
+    """
+    Get the positions reached after the given fractions of the moves of every game
+    """
+    positions = list()
+    for moves in games:
+        for fraction in fractions:
+            board = Board(board_size)
+            for turn, move in enumerate(moves[:int(len(moves) * fraction)]):
+                board.make_move(move, PLAYER_1_TOKEN if turn % 2 == 0 else PLAYER_2_TOKEN)
+            positions.append(board)
+    return positions
+
+
+def measure_rate(function, calls: list, min_time: float) -> float:
+    """
+    Get the number of calls per second of function, repeating the list of call arguments for at least min_time seconds
+    """
+    num_calls = 0
+    start = time.perf_counter()
+    while True:
+        for arguments in calls:
+            function(*arguments)
+        num_calls += len(calls)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return num_calls / elapsed
+
+
+def benchmark_search(board: Board, player_type: type[Player], max_depth: int,
+                     player_options: dict | None = None) -> dict[str, dict[str, float]]:
+    """
+    Get the time to each depth and the nodes per second of a search from the position with an empty transposition table
+
+    player_options are passed on to the player, see SEARCH_PLAYERS
+    """
+    num_moves = len(board.get_occupied_tiles(PLAYER_1_TOKEN)) + len(board.get_occupied_tiles(PLAYER_2_TOKEN))
+    token = PLAYER_1_TOKEN if num_moves % 2 == 0 else PLAYER_2_TOKEN
+    results = dict()
+    for depth in range(1, max_depth + 1):
+        player = player_type(token, board=board, **(player_options or dict()))
+        player.max_depth = depth
+        player.get_move()
+        results[f'depth_{depth}'] = {
+            'seconds': player.search_stats.total_time,
+            'nodes_per_second': player.search_stats.get_num_nodes() / player.search_stats.total_time
+        }
+    return results
+
+
+def run_benchmarks(board_sizes: list[int], seed: int, min_time: float, games_file: str | None = None) -> dict:
+    """
+    Measure every benchmark for every board size
+
+    Rates are in calls per second and times in seconds; for searches the times add up over the positions
+    """
+    results = dict()
+    for board_size in board_sizes:
+        games = create_games(board_size, seed, games_file)
+        positions = get_positions(board_size, games, [0.25, 0.5, 0.75])
+        final_positions = get_positions(board_size, games, [1])
+        evaluator = AI_Minmax_Graph_Player(PLAYER_1_TOKEN)
+        calls = [(board, token) for board in positions for token in (PLAYER_1_TOKEN, PLAYER_2_TOKEN)]
+
+        def evaluate_score(board: Board, token: int):
+            evaluator.board = board
+            evaluator.evaluate_score(token, 2)
+
+        def evaluate_score_two_distance(board: Board, token: int):
+            evaluator.board = board
+            evaluator.evaluate_score_two_distance(token, 2)
+
+        size_results = {
+            'evaluate_score': {'calls_per_second': measure_rate(evaluate_score, calls, min_time)},
+            'evaluate_score_two_distance': {
+                'calls_per_second': measure_rate(evaluate_score_two_distance, calls, min_time)
+            },
+            'get_bridge_reward': {
+                'calls_per_second': measure_rate(lambda board, token: board.get_bridge_reward(token), calls, min_time)
+            },
+            'check_victory': {
+                'calls_per_second': measure_rate(lambda board: board.check_victory(),
+                                                 [(board,) for board in positions + final_positions], min_time)
+            },
+            'get_win_path': {
+                'calls_per_second': measure_rate(lambda board: board.get_win_path(),
+                                                 [(board,) for board in final_positions], min_time)
+            },
+        }
+        # Searches are timed on the middle game positions only, they dominate the running time of the benchmark
+        search_positions = positions[1::3]
+        for player_type, player_options in SEARCH_PLAYERS:
+            search_results = [benchmark_search(board, player_type, SEARCH_DEPTHS[board_size], player_options)
+                              for board in search_positions]
+            size_results[player_type.__name__] = {
+                depth: {
+                    'seconds': sum(result[depth]['seconds'] for result in search_results),
+                    'nodes_per_second': sum(result[depth]['nodes_per_second']
+                                            for result in search_results) / len(search_results)
+                } for depth in search_results[0]
+            }
+        results[str(board_size)] = size_results
+        print(f'Board size {board_size} done', file=sys.stderr)
+    return results
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Get a line for every measure present in both results, marking those that got worse by more than tolerance
+    """
+    lines = list()
+    for board_size, size_results in results.items():
+        for benchmark, measures in size_results.items():
+            baseline_measures = dict(flatten_measures(baseline.get(board_size, dict()).get(benchmark, dict())))
+            for name, value in flatten_measures(measures):
+                baseline_value = baseline_measures.get(name)
+                if baseline_value is None or baseline_value == 0:
+                    continue
+                # Times are better when lower, rates when higher
+                ratio = baseline_value / value if name.endswith('.seconds') else value / baseline_value
+                status = 'SLOWER' if ratio < 1 - tolerance else 'ok'
+                lines.append(f'{board_size:>3} {benchmark:<28} {name:<28} {ratio:7.2f}x {status}')
+    return lines
+
+
+def flatten_measures(measures: dict, prefix: str = '') -> list[tuple[str, float]]:
+    """
+    Get the (name, value) pairs of the nested measures of a benchmark, names joined by dots
+    """
+    result = list()
+    for name, value in measures.items():
+        if isinstance(value, dict):
+            result.extend(flatten_measures(value, prefix + name + '.'))
+        else:
+            result.append((prefix + name, value))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the evaluation and search hot paths')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(BOARD_SIZES))
+    parser.add_argument('--seed', type=int, default=0, help='seed of the games the positions are taken from')
+    parser.add_argument('--games-file', help='arena results file to take the positions from instead')
+    parser.add_argument('--min-time', type=float, default=0.5, help='seconds every rate is measured for')
+    parser.add_argument('--output', help='JSON file for the results, standard output by default')
+    parser.add_argument('--baseline', help='JSON file of earlier results to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='relative slowdown reported as a regression')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.seed, args.min_time, args.games_file)
+    if args.output is not None:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+    if args.baseline is not None:
+        with open(args.baseline) as baseline_file:
+            lines = compare_to_baseline(results, json.load(baseline_file), args.tolerance)
+        print('\n'.join(lines), file=sys.stderr)
+        if any(line.endswith('SLOWER') for line in lines):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
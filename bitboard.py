@@ -0,0 +1,275 @@
+from graph import UNOCCUPIED, PLAYER_1_TOKEN, PLAYER_2_TOKEN
+
+
+# Offsets (row, column) of the six neighbours of a tile, in the order used by Board.get_neighboring_tiles
+NEIGHBOUR_OFFSETS = ((-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0))
+
+# Bridges as used by Board.get_bridge_reward: the two carrier tiles, the tile across the bridge, and the reward
+# added for (player 1, player 2) when the tile across the bridge lies beyond the border
+BRIDGE_PATTERNS = (
+    ((-1, 0), (-1, 1), (-2, 1), (0, 0.75)),  # top
+    ((-1, 1), (0, 1), (-1, 2), (0.75, 0)),  # top right
+    ((-1, 0), (0, -1), (-1, -1), (0.25, 0.25)),  # top left
+    ((1, 0), (1, -1), (2, -1), (0, 0.75)),  # bottom
+    ((1, 0), (0, 1), (1, 1), (0.25, 0.25)),  # bottom right
+    ((1, -1), (0, -1), (1, -2), (0.75, 0)),  # bottom left
+)
+
+
+class BitBoardGeometry(object):
+    """
+    Masks shared by all bitboards of one size
+
+    Tile (i, j) is bit i * board_size + j of a mask
+    """
+
+    def __init__(self, board_size: int):
+        """
+        Precompute the neighbour, border and bridge masks for a board size
+        """
+        self.board_size = board_size
+        self.num_tiles = board_size * board_size
+        self.full_mask = (1 << self.num_tiles) - 1
+        self.left_column = sum(1 << (i * board_size) for i in range(board_size))
+        self.right_column = self.left_column << (board_size - 1)
+        self.top_row = (1 << board_size) - 1
+        self.bottom_row = self.top_row << (self.num_tiles - board_size)
+        self.tiles_by_column = [(i * board_size + j, (i, j)) for j in range(board_size) for i in range(board_size)]
+        '''Bit index and position of every tile, ordered column by column like Board.get_unoccupied_tiles'''
+
+        self.neighbour_masks = [self.__get_tiles_mask(tile, NEIGHBOUR_OFFSETS) for tile in range(self.num_tiles)]
+        self.bridge_masks = [self.__get_tiles_mask(tile, [pattern[2] for pattern in BRIDGE_PATTERNS])
+                             for tile in range(self.num_tiles)]
+        self.neighbour_shifts = [(self.__get_shift(offset), self.__get_sources_mask(offset)) for offset in NEIGHBOUR_OFFSETS]
+        '''For every direction, the bit shift to a neighbour and the mask of tiles having a neighbour in that direction'''
+        self.bridge_shifts = [(
+            self.__get_shift(carrier_1), self.__get_shift(carrier_2), self.__get_shift(target),
+            self.__get_sources_mask(carrier_1) & self.__get_sources_mask(carrier_2), self.__get_sources_mask(target), border_rewards
+        ) for carrier_1, carrier_2, target, border_rewards in BRIDGE_PATTERNS]
+
+    def __get_shift(self, offset: tuple[int, int]) -> int:
+        """
+        Get the difference in bit index between a tile and the tile at given offset
+        """
+        return offset[0] * self.board_size + offset[1]
+
+    def __get_sources_mask(self, offset: tuple[int, int]) -> int:
+        """
+        Get the mask of tiles for which the tile at given offset is on the board
+        """
+        mask = 0
+        for i in range(self.board_size):
+            for j in range(self.board_size):
+                if 0 <= i + offset[0] < self.board_size and 0 <= j + offset[1] < self.board_size:
+                    mask |= 1 << (i * self.board_size + j)
+        return mask
+
+    def __get_tiles_mask(self, tile: int, offsets) -> int:
+        """
+        Get the mask of the tiles at given offsets from a tile that are on the board
+        """
+        i, j = divmod(tile, self.board_size)
+        mask = 0
+        for di, dj in offsets:
+            if 0 <= i + di < self.board_size and 0 <= j + dj < self.board_size:
+                mask |= 1 << ((i + di) * self.board_size + j + dj)
+        return mask
+
+
+geometry_by_size: dict[int, BitBoardGeometry] = dict()
+
+
+def get_bitboard_geometry(board_size: int) -> BitBoardGeometry:
+    """
+    Get the masks for a board size, computing them the first time the size is used
+    """
+    if board_size not in geometry_by_size:
+        geometry_by_size[board_size] = BitBoardGeometry(board_size)
+    return geometry_by_size[board_size]
+
+
+def shift_mask(mask: int, shift: int) -> int:
+    """
+    Move every bit of the mask by shift positions, towards higher indices if positive
+    """
+    return mask << shift if shift >= 0 else mask >> -shift
+
+
+class BitBoard(object):
+    """
+    Hex board storing each player's tokens as the bits of a Python integer
+
+    Provides the same position queries as Board, computed with bitwise operations
+    """
+
+    def __init__(self, board_size: int, player_1_tiles: int = 0, player_2_tiles: int = 0):
+        """
+        Initialize a bitboard, empty unless the masks of both players' tiles are given
+        """
+        self.board_size = board_size
+        self.geometry = get_bitboard_geometry(board_size)
+        self.tiles = [0, player_1_tiles, player_2_tiles]
+        '''Mask of tiles occupied by each player, indexed by player token'''
+
+    def copy(self) -> 'BitBoard':
+        """
+        Get an independent copy of the position
+        """
+        return BitBoard(self.board_size, self.tiles[PLAYER_1_TOKEN], self.tiles[PLAYER_2_TOKEN])
+
+    def encode(self) -> tuple[int, int, int]:
+        """
+        Get a compact picklable representation of the position
+        """
+        return self.board_size, self.tiles[PLAYER_1_TOKEN], self.tiles[PLAYER_2_TOKEN]
+
+    @staticmethod
+    def decode(encoding: tuple[int, int, int]) -> 'BitBoard':
+        """
+        Rebuild a bitboard from its encoding
+        """
+        return BitBoard(*encoding)
+
+    def __hash__(self) -> int:
+        return hash(self.encode())
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, BitBoard) and self.encode() == other.encode()
+
+    def make_move(self, tile_pos: tuple[int, int], player_token: int):
+        """
+        Place a player token on an unoccupied tile
+        """
+        self.tiles[player_token] |= 1 << (tile_pos[0] * self.board_size + tile_pos[1])
+
+    def remove_move(self, position: tuple[int, int]):
+        """
+        Remove token in specified position from board
+        """
+        bit = 1 << (position[0] * self.board_size + position[1])
+        self.tiles[PLAYER_1_TOKEN] &= ~bit
+        self.tiles[PLAYER_2_TOKEN] &= ~bit
+
+    def get_tile(self, tile_pos: tuple[int, int]) -> int:
+        """
+        Get the token on a tile
+        """
+        index = tile_pos[0] * self.board_size + tile_pos[1]
+        if self.tiles[PLAYER_1_TOKEN] >> index & 1:
+            return PLAYER_1_TOKEN
+        if self.tiles[PLAYER_2_TOKEN] >> index & 1:
+            return PLAYER_2_TOKEN
+        return UNOCCUPIED
+
+    def get_empty_mask(self) -> int:
+        """
+        Get the mask of unoccupied tiles
+        """
+        return self.geometry.full_mask & ~(self.tiles[PLAYER_1_TOKEN] | self.tiles[PLAYER_2_TOKEN])
+
+    def is_empty(self) -> bool:
+        """
+        Check if board is empty
+        """
+        return self.tiles[PLAYER_1_TOKEN] == 0 and self.tiles[PLAYER_2_TOKEN] == 0
+
+    def is_tile_occupied(self, tile_pos: tuple[int, int]) -> bool:
+        """
+        Return whether the tile is occupied by a player's token
+        """
+        return (self.tiles[PLAYER_1_TOKEN] | self.tiles[PLAYER_2_TOKEN]) >> (tile_pos[0] * self.board_size + tile_pos[1]) & 1 == 1
+
+    def get_unoccupied_tiles(self) -> list[tuple[int, int]]:
+        """
+        Get all unoccupied tiles, column by column
+        """
+        occupied = self.tiles[PLAYER_1_TOKEN] | self.tiles[PLAYER_2_TOKEN]
+        return [position for index, position in self.geometry.tiles_by_column if not occupied >> index & 1]
+
+    def get_occupied_tiles(self, player_token: int) -> list[tuple[int, int]]:
+        """
+        Get all occupied tiles by player with player_token, column by column
+        """
+        tiles = self.tiles[player_token]
+        return [position for index, position in self.geometry.tiles_by_column if tiles >> index & 1]
+
+    def get_num_empty_tiles(self) -> int:
+        """
+        Get the number of unoccupied tiles
+        """
+        return self.geometry.num_tiles - (self.tiles[PLAYER_1_TOKEN] | self.tiles[PLAYER_2_TOKEN]).bit_count()
+
+    def get_connected_tiles(self, seeds: int, allowed: int) -> int:
+        """
+        Flood fill: get the mask of allowed tiles connected to the seed tiles through allowed tiles
+        """
+        reached = seeds & allowed
+        while True:
+            grown = reached
+            for shift, sources in self.geometry.neighbour_shifts:
+                grown |= shift_mask(reached & sources, shift)
+            grown &= allowed
+            if grown == reached:
+                return reached
+            reached = grown
+
+    def check_player_win(self, player_token: int) -> bool:
+        """
+        Check if the player connected its two borders
+        """
+        geometry = self.geometry
+        if player_token == PLAYER_1_TOKEN:
+            start_border, end_border = geometry.left_column, geometry.right_column
+        else:
+            start_border, end_border = geometry.top_row, geometry.bottom_row
+        return self.get_connected_tiles(start_border, self.tiles[player_token]) & end_border != 0
+
+    def check_victory(self) -> bool:
+        """
+        Check if one of the players won the game
+        """
+        return self.get_win_token() is not None
+
+    def get_win_token(self) -> int | None:
+        """
+        Get winner
+        """
+        if self.check_player_win(PLAYER_1_TOKEN):
+            return PLAYER_1_TOKEN
+        if self.check_player_win(PLAYER_2_TOKEN):
+            return PLAYER_2_TOKEN
+        return None
+
+    def get_bridge_carriers(self, player_token: int) -> int:
+        """
+        Get the mask of empty tiles carrying a bridge between two of the player's tokens
+        """
+        own, empty = self.tiles[player_token], self.get_empty_mask()
+        carriers = 0
+        for shift_1, shift_2, target_shift, sources, target_sources, _ in self.geometry.bridge_shifts:
+            bridges = own & sources & target_sources & shift_mask(empty, -shift_1) & shift_mask(empty, -shift_2) \
+                & shift_mask(own, -target_shift)
+            carriers |= shift_mask(bridges, shift_1) | shift_mask(bridges, shift_2)
+        return carriers
+
+    def get_bridge_reward(self, player_token: int) -> float:
+        """
+        Get the bridge reward for specified player, equal to Board.get_bridge_reward
+        """
+        own, empty = self.tiles[player_token], self.get_empty_mask()
+        num_tiles = own.bit_count()
+        if num_tiles == 0:
+            return 0
+        reward: float = 0
+        for shift_1, shift_2, target_shift, sources, target_sources, border_rewards in self.geometry.bridge_shifts:
+            open_bridges = own & sources & shift_mask(empty, -shift_1) & shift_mask(empty, -shift_2)
+            reward += 0.25 * open_bridges.bit_count()
+            reward += 0.25 * (open_bridges & target_sources & shift_mask(own, -target_shift)).bit_count()
+            reward += border_rewards[player_token - 1] * (open_bridges & ~target_sources).bit_count()
+        return reward / num_tiles
+
+    def get_board_string(self) -> str:
+        """
+        Get string representation of board state
+        """
+        return ''.join(str(self.get_tile((i, j))) for i in range(self.board_size) for j in range(self.board_size))
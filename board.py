@@ -1,26 +1,12 @@
 import numpy
+from collections import deque
 from graph import *
+from bitboard import BitBoard
+from board_geometry import *
 
 
-adjacent_neighbors_dict = dict()
-adjacent_neighbor_nodes_dict: dict[int, list[HexNode]] = dict()
-transposition_table = dict()
-
-
-def store(state: str, depth: int, evaluation: float, move: tuple[int, int]):
-    if state not in transposition_table:
-        transposition_table[state] = {}
-    transposition_table[state][depth] = evaluation, move
-
-
-def load(state: str, depth: int):
-    if state not in transposition_table:
-        return None, (None, None)
-    if depth in transposition_table[state]:
-        return transposition_table[state][depth]
-    else:
-        depths = transposition_table[state].keys()
-        return transposition_table[state][min(depths)]
+OFF_BOARD = -1
+'''Value of the padding around the board used by get_bridge_reward'''
 
 
 class Board(object):
@@ -28,510 +14,409 @@ class Board(object):
     Class containing data structures for the hex board
     """
 
+    geometry: BoardGeometry
+    '''Neighbours, graph edges, hashing keys and index tables of the board size, shared by all boards of that size'''
     board: numpy.ndarray
     '''Keeps track of the tokens (or lack of tokens) on the board'''
+    padded_board: numpy.ndarray
+    '''Copy of the board with a border of two OFF_BOARD tiles, reused by get_bridge_reward'''
+    bridge_indices: numpy.ndarray
+    bridge_border_rewards: numpy.ndarray
+    '''Reward of every bridge orientation for each player when its target tile lies beyond the border'''
+    bitboard: BitBoard
+    '''The same tokens stored as bitsets, used for fast queries over the whole board'''
     board_size: int
     num_nodes: int
     graph: HexGraph
     hex_nodes_by_position: dict[tuple[int, int] | str, HexNode]
     special_hex_nodes: dict[str, HexNode]
+    zobrist_key: int
+    '''Zobrist hash of the current position, updated incrementally by make_move and remove_move'''
+    zobrist_tile_keys: list[list[int]]
+    zobrist_depth_keys: list[int]
+    group_parents: list[int]
+    '''Union-find parent of every node, groups are tiles of the same color connected to each other or to a border'''
+    group_sizes: list[int]
+    group_history: list[tuple[tuple[int, int], list[tuple[int, int]]]]
+    '''Unions made by every move still on the board, used to undo them in remove_move'''
+    distance_buffers: tuple[list[float], list[float], list[bool], list[bool]] | None
+    '''Scratch arrays of the shortest path searches on this board, see shortest_path.get_distance_buffers'''
+    two_distance_buffers: tuple[list[int], ...] | None
+    '''Scratch arrays of get_two_distance on this board, see shortest_path.get_two_distance_buffers'''
+    adjacent_neighbors_dict: dict[tuple[int, int], tuple[tuple[int, int], ...]]
+    adjacent_neighbor_nodes_dict: dict[int, list[HexNode]]
 
     def __init__(self, board_size: int):
         """
         Initialize an empty hex board
         """
-        Board.board_size = board_size
-        Board.num_nodes = board_size * board_size
-        Board.create_initial_nodes_and_board()
-        for i in range(board_size):
-            for j in range(board_size):
-                adjacent_neighbors_dict[(i, j)] = self.get_neighboring_tiles((i, j))
-                node = self.hex_nodes_by_position[(i, j)]
-                adjacent_neighbor_nodes_dict[node.node_value] = self.get_neighbouring_nodes((i, j))
-        # The neighbours for LEFT, TOP, RIGHT and DOWN node need to be added
-        adjacent_neighbor_nodes_dict[Board.num_nodes + UP] = list()
-        adjacent_neighbor_nodes_dict[Board.num_nodes + DOWN] = list()
-        adjacent_neighbor_nodes_dict[Board.num_nodes + LEFT] = list()
-        adjacent_neighbor_nodes_dict[Board.num_nodes + RIGHT] = list()
-        list_nodes: list[HexNode] = Board.graph.hex_nodes
-        for node in list_nodes:
-            if node.node_value < board_size:
-                adjacent_neighbor_nodes_dict[Board.num_nodes + UP].append(node)
-            elif Board.num_nodes - board_size <= node.node_value < Board.num_nodes:
-                adjacent_neighbor_nodes_dict[Board.num_nodes + DOWN].append(node)
-            if node.node_value % board_size == 0 and node.node_value < Board.num_nodes:
-                adjacent_neighbor_nodes_dict[Board.num_nodes + LEFT].append(node)
-            elif node.node_value % board_size == board_size - 1:
-                adjacent_neighbor_nodes_dict[Board.num_nodes + RIGHT].append(node)
-
-    @staticmethod
-    def create_initial_nodes_and_board():
+        self.board_size = board_size
+        self.num_nodes = board_size * board_size
+        self.geometry = get_board_geometry(board_size)
+        self.zobrist_tile_keys = self.geometry.zobrist_tile_keys
+        self.zobrist_depth_keys = self.geometry.zobrist_depth_keys
+        self.zobrist_key = 0
+        self.bitboard = BitBoard(board_size)
+        self.adjacent_neighbors_dict = self.geometry.neighbour_tiles
+        self.create_initial_nodes_and_board()
+        self.reset_groups()
+        self.distance_buffers = None
+        self.two_distance_buffers = None
+        hex_nodes = self.graph.hex_nodes
+        self.adjacent_neighbor_nodes_dict = {
+            node_value: [hex_nodes[neighbour] for neighbour in neighbours]
+            for node_value, neighbours in enumerate(self.geometry.node_neighbours)
+        }
+
+    def create_initial_nodes_and_board(self):
         """
         Create the main board, graph structure and hex nodes
+
+        Only the tokens are created here, the graph shares its edges with the graph of the board geometry
         """
-        new_board = list()
-        created_nodes: list[HexNode] = list()
-        edges_matrix: list[list[int]]
-        Board.hex_nodes_by_position = dict()
-        Board.special_hex_nodes = dict()
-        board_size = Board.board_size
-        value_counter = 0
-        for i in range(board_size):
-            new_board.append(list())
-            for j in range(board_size):
-                new_board[i].append(UNOCCUPIED)
-                new_node = HexNode(position=(i, j), node_value=value_counter)
-                created_nodes.append(new_node)
-                Board.hex_nodes_by_position[(i, j)] = new_node
-                value_counter += 1
-        new_node = HexNode(None, value_counter + LEFT, PLAYER_1_TOKEN)
-        Board.hex_nodes_by_position['L'] = new_node
-        created_nodes.append(new_node)
-        new_node = HexNode(None, value_counter + UP, PLAYER_2_TOKEN)
-        Board.hex_nodes_by_position['U'] = new_node
-        created_nodes.append(new_node)
-        new_node = HexNode(None, value_counter + RIGHT, PLAYER_1_TOKEN)
-        Board.hex_nodes_by_position['R'] = new_node
-        created_nodes.append(new_node)
-        new_node = HexNode(None, value_counter + DOWN, PLAYER_2_TOKEN)
-        Board.hex_nodes_by_position['D'] = new_node
-        created_nodes.append(new_node)
-        Board.board = numpy.array(new_board)
-        num_nodes = board_size * board_size + 4
-        edges_matrix = [[10000 for _ in range(num_nodes)] for _ in range(num_nodes)]
-        Board.graph = HexGraph(board_size=Board.board_size, hex_nodes=created_nodes, edges_matrix=edges_matrix)
-        Board.update_initial_edges()
-
-    @staticmethod
-    def update_initial_edges():
-        """
-        Set up the edges in the graph structure with hex nodes
-        """
-        nodes_list = Board.graph.hex_nodes
-        physical_nodes_num = Board.board_size * Board.board_size
-        for node in nodes_list:
-            node_value = node.node_value
-            module_value = node_value % Board.board_size
-            if node_value < physical_nodes_num:
-                if 0 <= node_value - Board.board_size <= physical_nodes_num - 1:
-                    Board.graph.update_edge_value(node_value, node_value - Board.board_size, 1, 1)
-                if 0 <= node_value + Board.board_size <= physical_nodes_num - 1:
-                    Board.graph.update_edge_value(node_value, node_value + Board.board_size, 1, 1)
-                if module_value != Board.board_size - 1:  # not last column
-                    if 0 <= node_value - Board.board_size + 1 <= physical_nodes_num - 1:
-                        Board.graph.update_edge_value(node_value, node_value - Board.board_size + 1, 1, 1)
-                    if 0 <= node_value + 1 <= physical_nodes_num - 1:
-                        Board.graph.update_edge_value(node_value, node_value + 1, 1, 1)
-                else:  # last column
-                    Board.graph.update_edge_value(node_value, physical_nodes_num + RIGHT, 0, 1)
-                if module_value != 0:  # not first column
-                    if 0 <= node_value + Board.board_size - 1 <= physical_nodes_num - 1:
-                        Board.graph.update_edge_value(node_value, node_value + Board.board_size - 1, 1, 1)
-                    if 0 <= node_value - 1 <= physical_nodes_num - 1:
-                        Board.graph.update_edge_value(node_value, node_value - 1, 1, 1)
-                else:  # first column
-                    Board.graph.update_edge_value(node_value, physical_nodes_num + LEFT, 0, 1)
-                if 0 <= node_value < Board.board_size:  # first row
-                    Board.graph.update_edge_value(node_value, physical_nodes_num + UP, 0, 1)
-                if physical_nodes_num - Board.board_size <= node_value < physical_nodes_num:  # last row
-                    Board.graph.update_edge_value(node_value, physical_nodes_num + DOWN, 0, 1)
-
-    @staticmethod
-    def clear_board():
+        board_size = self.board_size
+        created_nodes = create_hex_nodes(board_size)
+        self.hex_nodes_by_position = {node.position: node for node in created_nodes[:self.num_nodes]}
+        for key, border in (('L', LEFT), ('U', UP), ('R', RIGHT), ('D', DOWN)):
+            self.hex_nodes_by_position[key] = created_nodes[self.num_nodes + border]
+        self.special_hex_nodes = dict()
+        self.board = numpy.full((board_size, board_size), UNOCCUPIED)
+        self.padded_board = numpy.full((board_size + 4, board_size + 4), OFF_BOARD, dtype=self.board.dtype)
+        self.bridge_indices = self.geometry.bridge_indices
+        self.bridge_border_rewards = self.geometry.bridge_border_rewards
+        self.graph = self.geometry.graph.copy(created_nodes)
+
+    def clear_board(self):
         """
         Reset the board
         """
-        board_size = Board.board_size
-        num_nodes = board_size ** 2 + 4
-        for i in range(board_size):
-            for j in range(board_size):
-                Board.board[i][j] = UNOCCUPIED
-                node = Board.hex_nodes_by_position[(i, j)]
-                node.status = UNOCCUPIED
-        Board.graph.edges_matrix = [[10000 for _ in range(num_nodes)] for _ in range(num_nodes)]
-        Board.update_initial_edges()
+        self.board.fill(UNOCCUPIED)
+        for node in self.graph.hex_nodes[:self.num_nodes]:
+            node.status = UNOCCUPIED
+        self.graph.reset_edge_costs()
+        self.zobrist_key = 0
+        self.bitboard = BitBoard(self.board_size)
+        self.reset_groups()
+
+    def load_position(self, encoding: tuple[int, int, int]):
+        """
+        Set up the position of an encoded bitboard of the same size (see BitBoard.encode)
+        """
+        bitboard = BitBoard.decode(encoding)
+        if bitboard.board_size != self.board_size:
+            raise ValueError(f'Position of a {bitboard.board_size}x{bitboard.board_size} board given to a '
+                             f'{self.board_size}x{self.board_size} board')
+        self.clear_board()
+        for player_token in (PLAYER_1_TOKEN, PLAYER_2_TOKEN):
+            for tile_pos in bitboard.get_occupied_tiles(player_token):
+                self.make_move(tile_pos, player_token)
     
     def is_empty(self) -> bool:
         """
         Check if board is empty
         """
-        for i in range(self.board_size):
-            for j in range(self.board_size):
-                if Board.board[i, j] != UNOCCUPIED:
-                    return False
-        return True
+        return self.bitboard.is_empty()
 
-    @staticmethod
-    def make_move(tile_pos: tuple[int, int], player_token: int):
+    def make_move(self, tile_pos: tuple[int, int], player_token: int):
         """
         Place a player token on an unoccupied tile
         """
         row, column = tile_pos
-        Board.board[row, column] = player_token
-        node = Board.hex_nodes_by_position[tile_pos]
+        self.board[row, column] = player_token
+        self.zobrist_key ^= self.zobrist_tile_keys[row * self.board_size + column][player_token]
+        self.bitboard.make_move(tile_pos, player_token)
+        self.__add_to_groups(tile_pos, player_token)
+        node = self.hex_nodes_by_position[tile_pos]
         node.status = player_token
-        neighbour_positions = adjacent_neighbors_dict[tile_pos]
-        for position in neighbour_positions:
-            neighbour_node = Board.hex_nodes_by_position[position]
+        graph = self.graph
+        for slot in graph.edge_slots[node.node_value]:
+            neighbour_node = graph.hex_nodes[graph.edge_targets[slot]]
+            if neighbour_node.position is None:  # the costs from and to the borders never change
+                continue
             if node.status == neighbour_node.status:
-                Board.graph.update_edge_value(node.node_value, neighbour_node.node_value, 0, 0)
+                graph.update_edge_slot(slot, 0, 0)
             elif neighbour_node.status == UNOCCUPIED:
-                Board.graph.update_edge_value(node.node_value, neighbour_node.node_value, 1, 0)
+                graph.update_edge_slot(slot, 1, 0)
             else:  # neighbour_node.status == opponent_token:
-                Board.graph.update_edge_value(node.node_value, neighbour_node.node_value, 10000, 10000)
+                graph.update_edge_slot(slot, 10000, 10000)
 
-    @staticmethod
-    def remove_move(position: tuple[int, int]):
+    def remove_move(self, position: tuple[int, int]):
         """
         Remove token in specified position from board
         """
-        Board.board[position[0], position[1]] = UNOCCUPIED
-        node = Board.hex_nodes_by_position[position]
-        neighbour_positions = adjacent_neighbors_dict[position]
-        for position in neighbour_positions:
-            neighbour_node = Board.hex_nodes_by_position[position]
+        self.board[position[0], position[1]] = UNOCCUPIED
+        node = self.hex_nodes_by_position[position]
+        self.zobrist_key ^= self.zobrist_tile_keys[node.node_value][node.status]
+        self.bitboard.remove_move(position)
+        graph = self.graph
+        for slot in graph.edge_slots[node.node_value]:
+            neighbour_node = graph.hex_nodes[graph.edge_targets[slot]]
+            if neighbour_node.position is None:  # the costs from and to the borders never change
+                continue
             if node.status == neighbour_node.status:  # It was set to 0 because they were the same color, now should be 1
-                Board.graph.update_edge_value(node.node_value, neighbour_node.node_value, 0, 1)
+                graph.update_edge_slot(slot, 0, 1)
             elif neighbour_node.status == UNOCCUPIED:
-                Board.graph.update_edge_value(node.node_value, neighbour_node.node_value, 1, 1)
+                graph.update_edge_slot(slot, 1, 1)
             else:  # neighbour_node.status == opponent_token, it was set to inf if it was opponents tile, now should be 1
-                Board.graph.update_edge_value(node.node_value, neighbour_node.node_value, 0, 1)
+                graph.update_edge_slot(slot, 0, 1)
         node.status = UNOCCUPIED
+        self.__remove_from_groups(node.position)
 
-    @staticmethod
-    def find_all_neighbour_nodes(current_node: HexNode, player_token: int) -> list[HexNode]:
+    def find_all_neighbour_nodes(self, current_node: HexNode, player_token: int) -> list[HexNode]:
         """
         Get neighboring nodes of given node position not occupied by opponent
         """
         resulting_list: list[HexNode] = list()
-        neighbour_nodes = adjacent_neighbor_nodes_dict[current_node.node_value]
+        neighbour_nodes = self.adjacent_neighbor_nodes_dict[current_node.node_value]
         for node in neighbour_nodes:
             if node.status == UNOCCUPIED or node.status == player_token:
                 resulting_list.append(node)
         return resulting_list
 
-    @staticmethod
-    def get_available_nodes() -> list[HexNode]:
+    def get_available_nodes(self) -> list[HexNode]:
         """
         Get all nodes that are unoccupied
         """
         list_available_nodes: list[HexNode] = list()
-        all_nodes = Board.graph.hex_nodes
+        all_nodes = self.graph.hex_nodes
         for node in all_nodes:
             if node.status == UNOCCUPIED:
                 list_available_nodes.append(node)
         return list_available_nodes
 
-    @staticmethod
-    def is_tile_occupied(tile_pos: tuple[int, int]) -> bool:
+    def is_tile_occupied(self, tile_pos: tuple[int, int]) -> bool:
         """
         Return whether the tile is occupied by a player's token
         """
-        row, column = tile_pos
-        return Board.board[row, column] != UNOCCUPIED
+        return self.bitboard.is_tile_occupied(tile_pos)
 
-    @staticmethod
-    def get_unoccupied_tiles() -> list[tuple[int, int]]:
+    def get_unoccupied_tiles(self) -> list[tuple[int, int]]:
         """
         Get all unoccupied tiles
         """
-        return [(i, j) for j in range(Board.board_size) for i in range(Board.board_size) if Board.board[i, j] == UNOCCUPIED]
+        return self.bitboard.get_unoccupied_tiles()
 
-    @staticmethod
-    def get_occupied_tiles(player_token: int) -> list[tuple[int, int]]:
+    def get_occupied_tiles(self, player_token: int) -> list[tuple[int, int]]:
         """
         Get all occupied tiles by player with player_token
         """
-        return [(i, j) for j in range(Board.board_size) for i in range(Board.board_size) if Board.board[i, j] == player_token]
+        return self.bitboard.get_occupied_tiles(player_token)
     
-    @staticmethod
-    def get_bridge_reward(player_token: int) -> float:
+    def get_bridge_reward(self, player_token: int) -> float:
         """
         Get the bridge reward for specified player
 
         A bridge is a specific arrangement of hex tiles; it is often practical to reward strategies using these structures
+
+        All six bridge orientations are checked for all tiles at once on a copy of the board padded with OFF_BOARD tiles
         """
-        reward: float = 0
-        player_tiles = Board.get_occupied_tiles(player_token)
-        for tile in player_tiles:
-            i, j = tile
-            # top bridge
-            if Board.tile_in_board((i - 1, j)) and Board.tile_in_board((i - 1, j + 1)):
-                if Board.board[i - 1, j] == UNOCCUPIED and Board.board[i - 1, j + 1] == UNOCCUPIED:
-                    reward += 0.25
-                    if Board.tile_in_board((i - 2, j + 1)):
-                        if Board.board[i - 2, j + 1] == player_token:
-                            reward += 0.25
-                    elif player_token == PLAYER_2_TOKEN:
-                        reward += 0.75
-            # top right bridge
-            if Board.tile_in_board((i - 1, j + 1)) and Board.tile_in_board((i, j + 1)):
-                if Board.board[i - 1, j + 1] == UNOCCUPIED and Board.board[i, j + 1] == UNOCCUPIED:
-                    reward += 0.25
-                    if Board.tile_in_board((i - 1, j + 2)):
-                        if Board.board[i - 1, j + 2] == player_token:
-                            reward += 0.25
-                    elif player_token == PLAYER_1_TOKEN:
-                        reward += 0.75
-            # top left bridge
-            if Board.tile_in_board((i - 1, j)) and Board.tile_in_board((i, j - 1)):
-                if Board.board[i - 1, j] == UNOCCUPIED and Board.board[i, j - 1] == UNOCCUPIED:
-                    reward += 0.25
-                    if Board.tile_in_board((i - 1, j - 1)):
-                        if Board.board[i - 1, j - 1] == player_token:
-                            reward += 0.25
-                    else:
-                        reward += 0.25
-            # bottom bridge
-            if Board.tile_in_board((i + 1, j)) and Board.tile_in_board((i + 1, j - 1)):
-                if Board.board[i + 1, j] == UNOCCUPIED and Board.board[i + 1, j - 1] == UNOCCUPIED:
-                    reward += 0.25
-                    if Board.tile_in_board((i + 2, j - 1)):
-                        if Board.board[i + 2, j - 1] == player_token:
-                            reward += 0.25
-                    elif player_token == PLAYER_2_TOKEN:
-                        reward += 0.75
-            # bottom right bridge
-            if Board.tile_in_board((i + 1, j)) and Board.tile_in_board((i, j + 1)):
-                if Board.board[i + 1, j] == UNOCCUPIED and Board.board[i, j + 1] == UNOCCUPIED:
-                    reward += 0.25
-                    if Board.tile_in_board((i + 1, j + 1)):
-                        if Board.board[i + 1, j + 1] == player_token:
-                            reward += 0.25
-                    else:
-                        reward += 0.25
-            # bottom left bridge
-            if Board.tile_in_board((i + 1, j - 1)) and Board.tile_in_board((i, j - 1)):
-                if Board.board[i + 1, j - 1] == UNOCCUPIED and Board.board[i, j - 1] == UNOCCUPIED:
-                    reward += 0.25
-                    if Board.tile_in_board((i + 1, j - 2)):
-                        if Board.board[i + 1, j - 2] == player_token:
-                            reward += 0.25
-                    elif player_token == PLAYER_1_TOKEN:
-                        reward += 0.75
-        return reward / len(player_tiles)
-
-    @staticmethod
-    def tile_in_board(tile_pos: tuple[int, int]) -> bool:
+        board_size = self.board_size
+        own_tiles = self.board == player_token
+        num_tiles = numpy.count_nonzero(own_tiles)
+        if num_tiles == 0:  # shallow searches can reach leaves where a player hasn't played yet
+            return 0
+        self.padded_board[2:board_size + 2, 2:board_size + 2] = self.board
+        first_carriers, second_carriers, targets = self.padded_board.ravel()[self.bridge_indices]
+        open_bridges = own_tiles & (first_carriers == UNOCCUPIED) & (second_carriers == UNOCCUPIED)
+        reward = 0.25 * numpy.count_nonzero(open_bridges) + \
+            0.25 * numpy.count_nonzero(open_bridges & (targets == player_token)) + \
+            numpy.count_nonzero(open_bridges & (targets == OFF_BOARD), axis=(1, 2)) @ self.bridge_border_rewards[player_token - 1]
+        return float(reward) / int(num_tiles)
+
+    def tile_in_board(self, tile_pos: tuple[int, int]) -> bool:
         """
         Check if tile is in board
         """
         i, j = tile_pos
-        if 0 <= i < Board.board_size and 0 <= j < Board.board_size:
+        if 0 <= i < self.board_size and 0 <= j < self.board_size:
             return True
         return False
 
-    @staticmethod
-    def get_neighboring_tiles(tile_pos: tuple[int, int]) -> list[tuple[int, int]]:
+    def get_neighboring_tiles(self, tile_pos: tuple[int, int]) -> list[tuple[int, int]]:
         """
         Return neighboring tiles of a given tile
         """
-        result: list[tuple[int, int]]
-        result = list()
-        row, column = tile_pos
-        if 0 <= row - 1:
-            result.append((row - 1, column))
-        if 0 <= row - 1 and column + 1 < Board.board_size:
-            result.append((row - 1, column + 1))
-        if 0 <= column - 1:
-            result.append((row, column - 1))
-        if column + 1 < Board.board_size:
-            result.append((row, column + 1))
-        if row + 1 < Board.board_size and 0 <= column - 1:
-            result.append((row + 1, column - 1))
-        if row + 1 < Board.board_size:
-            result.append((row + 1, column))
-        return result
+        return list(self.adjacent_neighbors_dict[tile_pos])
 
-    @staticmethod
-    def get_neighbouring_nodes(node_position: tuple[int, int]) -> list[HexNode]:
+    def get_neighbouring_nodes(self, node_position: tuple[int, int]) -> list[HexNode]:
         """
         Get neighboring nodes of given node position
         """
-        adjacent_neighbor_positions = adjacent_neighbors_dict[node_position]
+        adjacent_neighbor_positions = self.adjacent_neighbors_dict[node_position]
         all_neighbouring_nodes: list[HexNode] = list()
         for neighbor_position in adjacent_neighbor_positions:
-            all_neighbouring_nodes.append(Board.hex_nodes_by_position[neighbor_position])
+            all_neighbouring_nodes.append(self.hex_nodes_by_position[neighbor_position])
         row = node_position[0]
         column = node_position[1]
         if row == 0:  # if it is a node in the first row, TOP is also their neighbour
-            all_neighbouring_nodes.append(Board.hex_nodes_by_position['U'])
-        elif row == Board.board_size - 1:  # if it is a node in the last row, DOWN is also their neighbour
-            all_neighbouring_nodes.append(Board.hex_nodes_by_position['D'])
+            all_neighbouring_nodes.append(self.hex_nodes_by_position['U'])
+        elif row == self.board_size - 1:  # if it is a node in the last row, DOWN is also their neighbour
+            all_neighbouring_nodes.append(self.hex_nodes_by_position['D'])
         if column == 0:  # if it is a node in the first column, LEFT is also their neighbour
-            all_neighbouring_nodes.append(Board.hex_nodes_by_position['L'])
-        elif column == Board.board_size - 1:  # if it is a node in the last column, RIGHT is also their neighbour
-            all_neighbouring_nodes.append(Board.hex_nodes_by_position['R'])
+            all_neighbouring_nodes.append(self.hex_nodes_by_position['L'])
+        elif column == self.board_size - 1:  # if it is a node in the last column, RIGHT is also their neighbour
+            all_neighbouring_nodes.append(self.hex_nodes_by_position['R'])
         return all_neighbouring_nodes
 
-    @staticmethod
-    def get_neighboring_tiles_by_token(tile_pos: tuple[int, int], by_token: int | None = None) -> list[tuple[int, int]]:
+    def get_neighboring_tiles_by_token(self, tile_pos: tuple[int, int], by_token: int | None = None) -> list[tuple[int, int]]:
         """
         Return neighboring tiles of a given tile
 
         Furthermore, filter by UNOCCUPIED, PLAYER_1_TOKEN, PLAYER_2_TOKEN or None
         """
-        result = Board.get_neighboring_tiles(tile_pos)
+        result = self.get_neighboring_tiles(tile_pos)
         if by_token is None:
             return result
         if by_token == UNOCCUPIED:
-            return [(i, j) for (i, j) in result if Board.board[i, j] == UNOCCUPIED]
+            return [(i, j) for (i, j) in result if self.board[i, j] == UNOCCUPIED]
         if by_token == PLAYER_1_TOKEN:
-            return [(i, j) for (i, j) in result if Board.board[i, j] == PLAYER_1_TOKEN]
+            return [(i, j) for (i, j) in result if self.board[i, j] == PLAYER_1_TOKEN]
         if by_token == PLAYER_2_TOKEN:
-            return [(i, j) for (i, j) in result if Board.board[i, j] == PLAYER_2_TOKEN]
+            return [(i, j) for (i, j) in result if self.board[i, j] == PLAYER_2_TOKEN]
 
-    @staticmethod
-    def __is_tile_on_right_border(tile_pos: tuple[int, int]) -> bool:
+    def reset_groups(self):
         """
-        Check if tile is on the right border
+        Reset the union-find structure of connected same colored tiles to an empty board
+
+        The border nodes LEFT, UP, RIGHT and DOWN are part of the structure, so a player has won when its two borders
+        are in the same group
         """
-        row, column = tile_pos
-        return column == Board.board_size - 1
+        num_nodes = self.num_nodes + 4
+        self.group_parents = list(range(num_nodes))
+        self.group_sizes = [1] * num_nodes
+        self.group_history = list()
 
-    @staticmethod
-    def __is_tile_on_bottom_border(tile_pos: tuple[int, int]) -> bool:
+    def find_group(self, node_value: int) -> int:
         """
-        Check if tile is on the bottom border
+        Get the representative node of the group containing given node
+
+        Paths aren't compressed so that unions can be undone by remove_move; union by size keeps them short
         """
-        row, column = tile_pos
-        return row == Board.board_size - 1
+        parents = self.group_parents
+        while parents[node_value] != node_value:
+            node_value = parents[node_value]
+        return node_value
 
-    @staticmethod
-    def __check_player_1_win() -> bool:
+    def __join_groups(self, node_value_1: int, node_value_2: int, unions: list[tuple[int, int]]):
         """
-        Check if player 1 wins
+        Merge the groups of two nodes, recording the union so it can be undone
         """
-        visited_tiles = [[False for _ in range(Board.board_size)] for _ in range(Board.board_size)]
-        queue = list()
-        for row in range(Board.board_size):
-            if Board.board[row, 0] == PLAYER_1_TOKEN:
-                queue.append((row, 0))
-        while len(queue) > 0:
-            i, j = queue.pop(0)
-            if visited_tiles[i][j] is True:
-                continue
-            visited_tiles[i][j] = True
-            if Board.__is_tile_on_right_border((i, j)) is True:
-                return True
-            queue.extend(Board.get_neighboring_tiles_by_token((i, j), PLAYER_1_TOKEN))
-        return False
+        root_1, root_2 = self.find_group(node_value_1), self.find_group(node_value_2)
+        if root_1 == root_2:
+            return
+        if self.group_sizes[root_1] > self.group_sizes[root_2]:
+            root_1, root_2 = root_2, root_1
+        self.group_parents[root_1] = root_2
+        self.group_sizes[root_2] += self.group_sizes[root_1]
+        unions.append((root_1, root_2))
 
-    @staticmethod
-    def __check_player_2_win() -> bool:
+    def __add_to_groups(self, tile_pos: tuple[int, int], player_token: int):
         """
-        Check if player 2 wins
+        Join a newly placed token with neighboring tokens of the same color and with its borders
         """
-        visited_tiles = [[False for _ in range(Board.board_size)] for _ in range(Board.board_size)]
-        queue = list()
-        for column in range(Board.board_size):
-            if Board.board[0, column] == PLAYER_2_TOKEN:
-                queue.append((0, column))
-        while len(queue) > 0:
-            i, j = queue.pop(0)
-            if visited_tiles[i][j] is True:
-                continue
-            visited_tiles[i][j] = True
-            if Board.__is_tile_on_bottom_border((i, j)) is True:
-                return True
-            queue.extend(Board.get_neighboring_tiles_by_token((i, j), PLAYER_2_TOKEN))
-        return False
-
-    @staticmethod
-    def check_victory() -> bool:
+        row, column = tile_pos
+        node_value = row * self.board_size + column
+        unions: list[tuple[int, int]] = list()
+        for neighbour_position in self.adjacent_neighbors_dict[tile_pos]:
+            neighbour_node = self.hex_nodes_by_position[neighbour_position]
+            if neighbour_node.status == player_token:
+                self.__join_groups(node_value, neighbour_node.node_value, unions)
+        if player_token == PLAYER_1_TOKEN:
+            if column == 0:
+                self.__join_groups(node_value, self.num_nodes + LEFT, unions)
+            if column == self.board_size - 1:
+                self.__join_groups(node_value, self.num_nodes + RIGHT, unions)
+        else:
+            if row == 0:
+                self.__join_groups(node_value, self.num_nodes + UP, unions)
+            if row == self.board_size - 1:
+                self.__join_groups(node_value, self.num_nodes + DOWN, unions)
+        self.group_history.append((tile_pos, unions))
+
+    def __remove_from_groups(self, tile_pos: tuple[int, int]):
+        """
+        Undo the unions made when the token on given tile was placed
+
+        Moves are normally removed in reverse order; otherwise the groups are rebuilt from the tokens on the board
+        """
+        if len(self.group_history) > 0 and self.group_history[-1][0] == tile_pos:
+            _, unions = self.group_history.pop()
+            for root_1, root_2 in reversed(unions):
+                self.group_parents[root_1] = root_1
+                self.group_sizes[root_2] -= self.group_sizes[root_1]
+            return
+        self.reset_groups()
+        placed_nodes = [(node, node.status) for node in self.graph.hex_nodes[:self.num_nodes] if node.status != UNOCCUPIED]
+        for node, _ in placed_nodes:
+            node.status = UNOCCUPIED
+        for node, player_token in placed_nodes:  # replay the tokens so every union is recorded by a single move
+            self.__add_to_groups(node.position, player_token)
+            node.status = player_token
+
+    def check_victory(self) -> bool:
         """
         Check if one of the players won the game
         """
-        if Board.__check_player_1_win() is True or Board.__check_player_2_win() is True:
-            return True
-        return False
-
-    @staticmethod
-    def __get_player_1_win_path() -> list[tuple[int, int]] | None:
-        """
-        Get the winning path for player 1
-        """
-        visited_tiles = [[False for _ in range(Board.board_size)] for _ in range(Board.board_size)]
-        path, queue = list(), list()
-        win_path_flag = False
-        for row in range(Board.board_size):
-            if win_path_flag is True:
-                break
-            else:
-                path = list()  # last iteration was fruitless, continue with empty list
-            if Board.board[row, 0] == PLAYER_1_TOKEN:
-                queue.append((row, 0))
-                while len(queue) > 0:
-                    i, j = queue.pop(0)
-                    if visited_tiles[i][j] is True:
-                        continue
-                    visited_tiles[i][j] = True
-                    path.append((i, j))
-                    if Board.__is_tile_on_right_border((i, j)) is True:
-                        win_path_flag = True
-                    queue.extend(Board.get_neighboring_tiles_by_token((i, j), PLAYER_1_TOKEN))
-        if win_path_flag is True:
-            return path
-        return None
+        return self.get_win_token() is not None
 
-    @staticmethod
-    def __get_player_2_win_path() -> list[tuple[int, int]] | None:
-        """
-        Get the winning path for player 2
-        """
-        visited_tiles = [[False for _ in range(Board.board_size)] for _ in range(Board.board_size)]
-        path, queue = list(), list()
-        win_path_flag = False
-        for column in range(Board.board_size):
-            if win_path_flag is True:
-                break
-            else:
-                path = list()  # last iteration was fruitless, continue with empty list
-            if Board.board[0, column] == PLAYER_2_TOKEN:
-                queue.append((0, column))
-                while len(queue) > 0:
-                    i, j = queue.pop(0)
-                    if visited_tiles[i][j] is True:
-                        continue
-                    visited_tiles[i][j] = True
-                    path.append((i, j))
-                    if Board.__is_tile_on_bottom_border((i, j)) is True:
-                        win_path_flag = True
-                    queue.extend(Board.get_neighboring_tiles_by_token((i, j), PLAYER_2_TOKEN))
-        if win_path_flag is True:
-            return path
-        return None
+    def __get_group_tiles(self, start_tile: tuple[int, int], player_token: int,
+                          visited_tiles: list[list[bool]]) -> list[tuple[int, int]]:
+        """
+        Get the tiles connected to the starting tile in breadth first order
+        """
+        path: list[tuple[int, int]] = list()
+        queue = deque([start_tile])
+        while len(queue) > 0:
+            i, j = queue.popleft()
+            if visited_tiles[i][j] is True:
+                continue
+            visited_tiles[i][j] = True
+            path.append((i, j))
+            queue.extend(self.get_neighboring_tiles_by_token((i, j), player_token))
+        return path
 
-    @staticmethod
-    def get_win_path() -> list[tuple[int, int]] | None:
+    def get_win_path(self) -> list[tuple[int, int]] | None:
         """
         Get the path that won the game
         """
-        if Board.__check_player_1_win() is True:
-            return Board.__get_player_1_win_path()
-        if Board.__check_player_2_win() is True:
-            return Board.__get_player_2_win_path()
+        win_token = self.get_win_token()
+        if win_token is None:
+            return None
+        # The border nodes join every tile touching a border, so the winning chain itself is found by a search
+        visited_tiles = [[False for _ in range(self.board_size)] for _ in range(self.board_size)]
+        for k in range(self.board_size):
+            start_tile = (k, 0) if win_token == PLAYER_1_TOKEN else (0, k)
+            if self.board[start_tile] != win_token or visited_tiles[start_tile[0]][start_tile[1]] is True:
+                continue
+            path = self.__get_group_tiles(start_tile, win_token, visited_tiles)
+            if any((j if win_token == PLAYER_1_TOKEN else i) == self.board_size - 1 for (i, j) in path):
+                return path
         return None
 
-    @staticmethod
-    def get_win_token() -> int | None:
+    def get_win_token(self) -> int | None:
         """
         Get winner
         """
-        if Board.__check_player_1_win() is True:
+        if self.find_group(self.num_nodes + LEFT) == self.find_group(self.num_nodes + RIGHT):
             return PLAYER_1_TOKEN
-        if Board.__check_player_2_win() is True:
+        if self.find_group(self.num_nodes + UP) == self.find_group(self.num_nodes + DOWN):
             return PLAYER_2_TOKEN
         return None
     
-    @staticmethod
-    def get_board_string() -> str:
+    def get_board_string(self) -> str:
         """
         Get string representation of board state
         """
         result: str = ''
-        for i in range(Board.board_size):
-            for j in range(Board.board_size):
-                result = result + str(Board.board[i, j])
+        for i in range(self.board_size):
+            for j in range(self.board_size):
+                result = result + str(self.board[i, j])
         return result
-            
\ No newline at end of file
+
+    def get_search_key(self, depth: int) -> int:
+        """
+        Get the transposition table key of the current position reached at given search depth
+
+        Evaluations subtract the number of turns played since the root, so the same position is keyed per depth
+        """
+        return self.zobrist_key ^ self.zobrist_depth_keys[depth]
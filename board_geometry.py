@@ -0,0 +1,184 @@
+import numpy, random
+from graph import *
+from bitboard import NEIGHBOUR_OFFSETS, BRIDGE_PATTERNS, BitBoardGeometry, get_bitboard_geometry
+
+
+# Offsets (row, column) of the six neighbours of a tile going around it, so that consecutive neighbours are adjacent
+RING_OFFSETS = ((-1, 0), (-1, 1), (0, 1), (1, 0), (1, -1), (0, -1))
+
+
+def create_zobrist_keys(board_size: int) -> tuple[list[list[int]], list[int]]:
+    """
+    Create the random 64-bit keys used for Zobrist hashing of a board of given size
+
+    Return one key per (tile, token) pair and one key per search depth; the generator is seeded with the board size,
+    so keys are the same in every process
+    """
+    generator = random.Random(board_size)
+    num_nodes = board_size * board_size
+    tile_keys = [[0, generator.getrandbits(64), generator.getrandbits(64)] for _ in range(num_nodes)]
+    depth_keys = [generator.getrandbits(64) for _ in range(num_nodes + 1)]
+    return tile_keys, depth_keys
+
+
+def get_initial_edges(board_size: int) -> list[tuple[int, int, int, int]]:
+    """
+    Get the edges between the hex nodes of the empty board, see HexGraph
+    """
+    edges: list[tuple[int, int, int, int]] = list()
+    physical_nodes_num = board_size * board_size
+    for node_value in range(physical_nodes_num):
+        module_value = node_value % board_size
+        if 0 <= node_value - board_size <= physical_nodes_num - 1:
+            edges.append((node_value, node_value - board_size, 1, 1))
+        if 0 <= node_value + board_size <= physical_nodes_num - 1:
+            edges.append((node_value, node_value + board_size, 1, 1))
+        if module_value != board_size - 1:  # not last column
+            if 0 <= node_value - board_size + 1 <= physical_nodes_num - 1:
+                edges.append((node_value, node_value - board_size + 1, 1, 1))
+            if 0 <= node_value + 1 <= physical_nodes_num - 1:
+                edges.append((node_value, node_value + 1, 1, 1))
+        else:  # last column
+            edges.append((node_value, physical_nodes_num + RIGHT, 0, 1))
+        if module_value != 0:  # not first column
+            if 0 <= node_value + board_size - 1 <= physical_nodes_num - 1:
+                edges.append((node_value, node_value + board_size - 1, 1, 1))
+            if 0 <= node_value - 1 <= physical_nodes_num - 1:
+                edges.append((node_value, node_value - 1, 1, 1))
+        else:  # first column
+            edges.append((node_value, physical_nodes_num + LEFT, 0, 1))
+        if 0 <= node_value < board_size:  # first row
+            edges.append((node_value, physical_nodes_num + UP, 0, 1))
+        if physical_nodes_num - board_size <= node_value < physical_nodes_num:  # last row
+            edges.append((node_value, physical_nodes_num + DOWN, 0, 1))
+    return edges
+
+
+def create_hex_nodes(board_size: int) -> list[HexNode]:
+    """
+    Create the unoccupied hex nodes of the tiles, by node value, followed by the border nodes LEFT, UP, RIGHT and DOWN
+    """
+    hex_nodes = [HexNode(position=(i, j), node_value=i * board_size + j)
+                 for i in range(board_size) for j in range(board_size)]
+    num_nodes = board_size * board_size
+    hex_nodes.append(HexNode(None, num_nodes + LEFT, PLAYER_1_TOKEN))
+    hex_nodes.append(HexNode(None, num_nodes + UP, PLAYER_2_TOKEN))
+    hex_nodes.append(HexNode(None, num_nodes + RIGHT, PLAYER_1_TOKEN))
+    hex_nodes.append(HexNode(None, num_nodes + DOWN, PLAYER_2_TOKEN))
+    return hex_nodes
+
+
+def read_only(array: numpy.ndarray) -> numpy.ndarray:
+    """
+    Make an array shared between boards read only, so that writing to it by mistake fails
+    """
+    array.flags.writeable = False
+    return array
+
+
+class BoardGeometry(object):
+    """
+    Everything about a board size that doesn't depend on the tokens, shared by all the boards of that size
+
+    Built once per size and process by get_board_geometry, so creating or clearing a board copies nothing but its
+    state. Nothing in it may be modified
+    """
+
+    def __init__(self, board_size: int):
+        """
+        Precompute the neighbours, graph, hashing keys and index tables of a board size
+        """
+        self.board_size = board_size
+        self.num_nodes = board_size * board_size
+        num_nodes = self.num_nodes
+        self.bitboard: BitBoardGeometry = get_bitboard_geometry(board_size)
+        self.zobrist_tile_keys, self.zobrist_depth_keys = create_zobrist_keys(board_size)
+
+        self.neighbour_tiles: dict[tuple[int, int], tuple[tuple[int, int], ...]] = {
+            (i, j): tuple((i + d_i, j + d_j) for d_i, d_j in NEIGHBOUR_OFFSETS
+                          if 0 <= i + d_i < board_size and 0 <= j + d_j < board_size)
+            for i in range(board_size) for j in range(board_size)
+        }
+        '''Neighbouring tiles of every tile, in NEIGHBOUR_OFFSETS order'''
+        self.tile_neighbours = [[n_i * board_size + n_j for n_i, n_j in self.neighbour_tiles[(i, j)]]
+                                for i in range(board_size) for j in range(board_size)]
+        '''The same neighbours as flat indices (row * board_size + column), by flat index'''
+        self.node_neighbours: list[list[int]] = list()
+        '''Node values of the neighbours of every node of the graph, the border nodes of a tile after its tiles'''
+        for tile, (i, j) in enumerate(self.neighbour_tiles):
+            node_neighbours = self.tile_neighbours[tile][:]
+            if i == 0:
+                node_neighbours.append(num_nodes + UP)
+            elif i == board_size - 1:
+                node_neighbours.append(num_nodes + DOWN)
+            if j == 0:
+                node_neighbours.append(num_nodes + LEFT)
+            elif j == board_size - 1:
+                node_neighbours.append(num_nodes + RIGHT)
+            self.node_neighbours.append(node_neighbours)
+        border_tiles = {
+            LEFT: [i * board_size for i in range(board_size)],
+            UP: list(range(board_size)),
+            RIGHT: [i * board_size + board_size - 1 for i in range(board_size)],
+            DOWN: list(range(num_nodes - board_size, num_nodes)),
+        }
+        self.node_neighbours.extend(border_tiles[border] for border in (LEFT, UP, RIGHT, DOWN))
+        self.graph = HexGraph(board_size, create_hex_nodes(board_size), get_initial_edges(board_size))
+        '''Graph of the empty board, every board graph is a copy of it sharing its edges'''
+
+        self.tiles_by_column_rank = [i * board_size + j for j in range(board_size) for i in range(board_size)]
+        '''Flat indices of the tiles ordered column by column'''
+        self.column_major_ranks = [0] * num_nodes
+        '''Rank of every flat tile index in tiles_by_column_rank'''
+        for rank, tile in enumerate(self.tiles_by_column_rank):
+            self.column_major_ranks[tile] = rank
+        center = (board_size - 1) / 2
+        self.centralities = [abs(i - center) + abs(j - center) for i in range(board_size) for j in range(board_size)]
+        '''Manhattan distance of every tile to the center of the board, by flat index'''
+
+        neighbour_indices = numpy.full((num_nodes, 6), num_nodes, dtype=numpy.intp)
+        for tile, neighbours in enumerate(self.tile_neighbours):
+            neighbour_indices[tile, :len(neighbours)] = neighbours
+        self.neighbour_indices = read_only(neighbour_indices)
+        '''Flat indices of the neighbours of every tile, padded with the index one past the last tile'''
+        padded_size = board_size + 4
+        rows, columns = numpy.indices((board_size, board_size)) + 2
+        self.bridge_indices = read_only(numpy.array([
+            [(rows + offset[0]) * padded_size + columns + offset[1] for offset in pattern[:3]]
+            for pattern in BRIDGE_PATTERNS
+        ]).transpose(1, 0, 2, 3))
+        '''Indices in the flattened board padded with two tiles of the first carrier, second carrier and target tile of
+        every bridge orientation for every tile'''
+        self.bridge_border_rewards = read_only(numpy.array([pattern[3] for pattern in BRIDGE_PATTERNS]).T)
+        '''Reward of every bridge orientation for each player when its target tile lies beyond the border'''
+
+        self.ring_indices: list[tuple[int, ...]] = list()
+        '''Flat indices of the six neighbours of every tile in RING_OFFSETS order; off board ones are num_nodes beyond
+        the left or right border, num_nodes + 1 beyond the top or bottom one, num_nodes + 2 beyond both'''
+        for i in range(board_size):
+            for j in range(board_size):
+                ring = list()
+                for d_i, d_j in RING_OFFSETS:
+                    row_inside, column_inside = 0 <= i + d_i < board_size, 0 <= j + d_j < board_size
+                    if row_inside and column_inside:
+                        ring.append((i + d_i) * board_size + j + d_j)
+                    elif row_inside:
+                        ring.append(num_nodes)
+                    elif column_inside:
+                        ring.append(num_nodes + 1)
+                    else:
+                        ring.append(num_nodes + 2)
+                self.ring_indices.append(tuple(ring))
+
+
+board_geometry_by_size: dict[int, BoardGeometry] = dict()
+'''Geometry of every board size used by this process'''
+
+
+def get_board_geometry(board_size: int) -> BoardGeometry:
+    """
+    Get the geometry of a board size, computing it the first time the size is used
+    """
+    if board_size not in board_geometry_by_size:
+        board_geometry_by_size[board_size] = BoardGeometry(board_size)
+    return board_geometry_by_size[board_size]
@@ -0,0 +1,106 @@
+import argparse, os, sys
+from concurrent.futures import ProcessPoolExecutor
+from player import *
+from opening_book import *
+
+
+def get_player_to_move(board: Board) -> int:
+    """
+    Get the token of the player whose turn it is, player 1 moves first
+    """
+    num_moves = len(board.get_occupied_tiles(PLAYER_1_TOKEN)) + len(board.get_occupied_tiles(PLAYER_2_TOKEN))
+    return PLAYER_1_TOKEN if num_moves % 2 == 0 else PLAYER_2_TOKEN
+
+
+def search_position(encoding: tuple[int, int, int], max_depth: int) -> tuple[tuple[int, int], float]:
+    """
+    Search the encoded position to max_depth, return the best move and its value
+
+    Among equally good moves the most central one is taken, so that the book does not depend on chance
+    """
+    board = Board(encoding[0])
+    board.load_position(encoding)
+    player = AI_Minmax_Graph_Player(get_player_to_move(board), board=board, use_opening_book=False)
+    unoccupied_tiles = sorted(board.get_unoccupied_tiles(), key=player.get_centrality)
+    minmax_results: list[float] = list()
+    player.search_root_moves(unoccupied_tiles, max_depth, minmax_results)
+    best = minmax_results.index(max(minmax_results))
+    return unoccupied_tiles[best], minmax_results[best]
+
+
+def get_book_move(entries: dict[int, tuple[tuple[int, int], float]], board: Board) -> tuple[int, int]:
+    """
+    Get the move of a position already searched for the book, directly or through its rotation like OpeningBook.get_move
+    """
+    if board.zobrist_key in entries:
+        return entries[board.zobrist_key][0]
+    row, column = entries[get_rotated_key(board)][0]
+    return board.board_size - 1 - row, board.board_size - 1 - column
+
+
+def build_opening_book(board_size: int, num_plies: int, max_depth: int,
+                       num_workers: int) -> dict[int, tuple[tuple[int, int], float]]:
+    """
+    Search the book moves of the positions of the first num_plies plies, by Zobrist key
+
+    For each side the book follows its own book moves and every reply of the opponent. A position whose 180 degree
+    rotation is already in the book is left out, OpeningBook.get_move finds it through the rotation
+    """
+    entries: dict[int, tuple[tuple[int, int], float]] = dict()
+    board = Board(board_size)
+    # The positions of every ply reached with the book moves of player 1, and of player 2
+    lines = {PLAYER_1_TOKEN: [board.bitboard.encode()], PLAYER_2_TOKEN: [board.bitboard.encode()]}
+    with ProcessPoolExecutor(num_workers) as executor:
+        for ply in range(num_plies):
+            to_search: dict[int, tuple[int, int, int]] = dict()
+            for book_player, encodings in lines.items():
+                if ply % 2 != book_player - 1:
+                    continue
+                for encoding in encodings:
+                    board.load_position(encoding)
+                    keys = (board.zobrist_key, get_rotated_key(board))
+                    if all(key not in entries and key not in to_search for key in keys):
+                        to_search[board.zobrist_key] = encoding
+            for key, result in zip(to_search, executor.map(search_position, to_search.values(),
+                                                           [max_depth] * len(to_search))):
+                entries[key] = result
+            print(f'Board size {board_size}: {len(to_search)} positions searched at ply {ply}', file=sys.stderr)
+
+            for book_player, encodings in lines.items():
+                next_encodings: dict[int, tuple[int, int, int]] = dict()
+                for encoding in encodings:
+                    board.load_position(encoding)
+                    if board.get_win_token() is not None:
+                        continue
+                    player_token = get_player_to_move(board)
+                    if player_token == book_player:
+                        moves = [get_book_move(entries, board)]
+                    else:
+                        moves = board.get_unoccupied_tiles()
+                    for tile_pos in moves:
+                        board.make_move(tile_pos, player_token)
+                        next_encodings[board.zobrist_key] = board.bitboard.encode()
+                        board.remove_move(tile_pos)
+                lines[book_player] = list(next_encodings.values())
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the opening books the AI players look up before searching')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 7, 9, 11])
+    parser.add_argument('--plies', type=int, default=3, help='number of plies from the empty board the book covers')
+    parser.add_argument('--depth', type=int, default=4, help='depth every book position is searched to')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--directory', default=OPENING_BOOK_DIRECTORY)
+    args = parser.parse_args()
+
+    os.makedirs(args.directory, exist_ok=True)
+    for board_size in args.sizes:
+        entries = build_opening_book(board_size, args.plies, args.depth, args.workers)
+        path = os.path.join(args.directory, os.path.basename(get_opening_book_path(board_size)))
+        write_opening_book(path, board_size, entries)
+        print(f'Board size {board_size}: {len(entries)} positions written to {path}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+import argparse, random, sys
+from player import *
+
+
+MAX_EMPTY_TILES = 7
+'''Most empty tiles of a checked position, so that the iterative deepening search goes through all its depths fast'''
+
+
+def get_random_positions(board_size: int, num_positions: int, generator: random.Random) -> list[Board]:
+    """
+    Get positions without a winner and with at most MAX_EMPTY_TILES empty tiles, reached by random moves
+    """
+    positions = list()
+    while len(positions) < num_positions:
+        board = Board(board_size)
+        tiles = board.get_unoccupied_tiles()
+        generator.shuffle(tiles)
+        num_moves = generator.randint(max(board.num_nodes - MAX_EMPTY_TILES, 1), board.num_nodes - 2)
+        for turn, tile_pos in enumerate(tiles[:num_moves]):
+            board.make_move(tile_pos, PLAYER_1_TOKEN if turn % 2 == 0 else PLAYER_2_TOKEN)
+        if board.get_win_token() is None:
+            positions.append(board)
+    return positions
+
+
+def get_best_moves(player: AI_Minmax_Graph_Player, unoccupied_tiles: list[tuple[int, int]],
+                   max_depth: int) -> tuple[float, set]:
+    """
+    Get the value and the equally best root moves of a full window search of the player to max_depth
+    """
+    minmax_results: list[float] = list()
+    player.search_root_moves(unoccupied_tiles, max_depth, minmax_results)
+    best_value = max(minmax_results)
+    return best_value, {tile for tile, value in zip(unoccupied_tiles, minmax_results) if value == best_value}
+
+
+def check_position(board: Board) -> bool:
+    """
+    Check that the transposition table left by an iterative deepening search with aspiration windows gives the same
+    best moves as an empty one when the position is then searched with a full window to the depth of its last iteration
+
+    Entries of the earlier iterations are too shallow to decide a node of the last one, so both searches must agree
+    """
+    num_moves = board.num_nodes - len(board.get_unoccupied_tiles())
+    token = PLAYER_1_TOKEN if num_moves % 2 == 0 else PLAYER_2_TOKEN
+    options = dict(board=board, use_opening_book=False, solver_empty_tiles=None)
+    searched = AI_Minmax_Graph_Player(token, **options)
+    searched.search_best_tile(60.0)
+    max_depth = len(searched.search_stats.nodes_per_depth) - 1
+    fresh = AI_Minmax_Graph_Player(token, **options)
+    unoccupied_tiles = sorted(board.get_unoccupied_tiles(), key=fresh.get_centrality)
+    return get_best_moves(searched, unoccupied_tiles, max_depth) == get_best_moves(fresh, unoccupied_tiles, max_depth)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that the iterative deepening search of AI_Minmax_Graph_Player '
+                                                 'leaves correct results in its transposition table')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[3, 4])
+    parser.add_argument('--positions', type=int, default=150, help='number of positions checked per board size')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    generator = random.Random(args.seed)
+    num_failures = 0
+    for board_size in args.sizes:
+        for board in get_random_positions(board_size, args.positions, generator):
+            if not check_position(board):
+                num_failures += 1
+                print(f'Different best moves after the iterative deepening search:\n{board.get_board_string()}',
+                      file=sys.stderr)
+        print(f'Board size {board_size}: {args.positions} positions checked', file=sys.stderr)
+    sys.exit(1 if num_failures > 0 else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,4 @@
-import sys
+import sys, threading
 from player import *
 from graphics import *
 
@@ -19,27 +19,33 @@ class Game(object):
         """
         Initialize necessary objects for a hex game
         """
-        Game.game_board = Board(board_size)
-        Game.game_graphics = Graphics(board_size)
-        Game.player_1 = player_1
-        Game.player_2 = player_2
-        Game.players = [player_1, player_2]
-        Game.player_turn = 0
+        self.game_board = Board(board_size)
+        self.search_board = Board(board_size)
+        '''Copy of the game board the AI players search on, so that the window can be redrawn during a search'''
+        self.game_graphics = Graphics(board_size)
+        self.player_1 = player_1
+        self.player_2 = player_2
+        player_1.board = self.game_board
+        player_2.board = self.game_board
+        self.players = [player_1, player_2]
+        self.player_turn = 0
+        self.ponder_thread: threading.Thread | None = None
+        self.pondering_player: AI_Minmax_Graph_Player | None = None
 
     def start(self):
         """
         Start a round of Hex
         """
-        Game.game_graphics.draw_grid()
+        self.game_graphics.draw_grid()
         while True:  # Game loop
 
-            if Game.players[Game.player_turn].is_ai() is True:
+            if self.players[self.player_turn].is_ai() is True:
                 self.__handle_ai_move()
             else:
                 self.__handle_human_move()
 
             # Advance turn to the next player
-            Game.player_turn = 1 - Game.player_turn
+            self.player_turn = 1 - self.player_turn
 
     @staticmethod
     def __check_for_quit(event: pygame.event.Event) -> bool:
@@ -53,165 +59,213 @@ class Game(object):
                 return True
         return False
 
-    @staticmethod
-    def __check_for_move(event: pygame.event.Event) -> bool:
+    def __check_for_move(self, event: pygame.event.Event) -> bool:
         """
         Check if the player made a valid move (clicked a tile)
         """
         if event.type == MOUSEBUTTONUP:
             click_x, click_y = event.pos
-            for i in range(Game.game_board.board_size):
-                for j in range(Game.game_board.board_size):
-                    if Game.game_graphics.click_board[i][j].collidepoint(click_x, click_y):
-                        if not Game.game_board.is_tile_occupied((i, j)):
+            for i in range(self.game_board.board_size):
+                for j in range(self.game_board.board_size):
+                    if self.game_graphics.click_board[i][j].collidepoint(click_x, click_y):
+                        if not self.game_board.is_tile_occupied((i, j)):
                             return True
                         return False
         return False
 
-    @staticmethod
-    def __check_for_win(player_turn: int):
+    def __check_for_win(self, player_turn: int):
         """
         Check and handle player win
         """
-        if Game.game_board.check_victory() is True:
-            Game.game_graphics.animate_win_path(Game.game_board.get_win_path(), player_turn + 1)
+        if self.game_board.check_victory() is True:
+            self.game_graphics.animate_win_path(self.game_board.get_win_path(), player_turn + 1)
             while True:
                 for event in pygame.event.get():
-                    if Game.__check_for_quit(event) is True:
-                        Game.__terminate()
-                    if Game.__check_for_reset(event) is True:
-                        Game.__reset_game()
+                    if self.__check_for_quit(event) is True:
+                        self.__terminate()
+                    if self.__check_for_reset(event) is True:
+                        self.__reset_game()
                         return
-                    if Game.__check_for_pause(event) is True:
-                        Game.__pause_game()
-                if Game.game_board.is_empty() is True:
+                    if self.__check_for_pause(event) is True:
+                        self.__pause_game()
+                if self.game_board.is_empty() is True:
                     return
-        Game.game_graphics.draw_turn(1 - player_turn)  # If player hasn't won, display the turn of the next player
+        self.game_graphics.draw_turn(1 - player_turn)  # If player hasn't won, display the turn of the next player
 
-    @staticmethod
-    def __check_for_reset(event: pygame.event.Event) -> bool:
+    def __check_for_reset(self, event: pygame.event.Event) -> bool:
         """
         Check requirements for resetting board 
         """
-        Game.game_graphics.animate_reset_text()
+        self.game_graphics.animate_reset_text()
         if event.type == MOUSEBUTTONUP:
             click_x, click_y = event.pos
-            if Game.game_graphics.reset_text_box.collidepoint(click_x, click_y) is True:
+            if self.game_graphics.reset_text_box.collidepoint(click_x, click_y) is True:
                 return True
         if event.type == KEYUP:
             if event.key == K_SPACE:
                 return True
         return False
 
-    @staticmethod
-    def __translate_pos_to_move(click_pos: tuple[float, float]) -> tuple[int, int] | None:
+    def __translate_pos_to_move(self, click_pos: tuple[float, float]) -> tuple[int, int] | None:
         """
         Translate coordinates of mouse click to tile position if possible
         """
         click_x, click_y = click_pos
-        for i in range(Game.game_board.board_size):
-            for j in range(Game.game_board.board_size):
-                if Game.game_graphics.click_board[i][j].collidepoint(click_x, click_y):
+        for i in range(self.game_board.board_size):
+            for j in range(self.game_board.board_size):
+                if self.game_graphics.click_board[i][j].collidepoint(click_x, click_y):
                     return i, j
         return None
 
-    @staticmethod
-    def __reset_game():
+    def __reset_game(self):
         """
         Handle reset of game board
         """
-        Game.game_graphics.draw_grid()
-        Game.game_board.clear_board()
-        Game.player_turn = 1  # end the turn on the second player for the next player to be first player
+        self.game_graphics.draw_grid()
+        self.game_board.clear_board()
+        self.player_turn = 1  # end the turn on the second player for the next player to be first player
 
-    @staticmethod
-    def __handle_ai_move():
+    def __handle_ai_move(self):
         """
         Handle AI's turn to make a move on the board
         """
-        tile_pos = Game.players[Game.player_turn].get_move()
-        Game.game_board.make_move(tile_pos, Game.players[Game.player_turn].token)
-        Game.game_graphics.draw_move(tile_pos, Game.players[Game.player_turn].token)
-        Game.__check_for_win(Game.player_turn)
+        tile_pos = self.__search_ai_move(self.players[self.player_turn])
+        if tile_pos is None:  # the game was reset during the search
+            return
+        self.game_board.make_move(tile_pos, self.players[self.player_turn].token)
+        self.game_graphics.draw_move(tile_pos, self.players[self.player_turn].token)
+        self.__check_for_win(self.player_turn)
 
-    @staticmethod
-    def __handle_move(tile_pos: tuple[int, int]):
+    def __search_ai_move(self, player: AI_Player) -> tuple[int, int] | None:
+        """
+        Search the AI player's move in a worker thread while the window keeps handling events
+
+        The search runs on a copy of the game board. Quitting, resetting or pausing cancels it; after a pause the search
+        starts again unless the game was reset, in which case None is returned
+        """
+        while True:
+            encoding, player_turn = self.game_board.bitboard.encode(), self.player_turn
+            self.search_board.load_position(encoding)
+            player.board = self.search_board
+            player.search_cancelled = False
+            moves: list[tuple[int, int]] = list()
+            errors: list[Exception] = list()
+
+            def search():
+                try:
+                    moves.append(player.get_move())
+                except SearchCancelled:
+                    pass
+                except Exception as error:
+                    errors.append(error)
+
+            search_thread = threading.Thread(target=search, daemon=True)
+            search_thread.start()
+            paused = False
+            try:
+                while search_thread.is_alive():
+                    for event in pygame.event.get():
+                        if self.__check_for_quit(event) is True:
+                            player.cancel_search()
+                            search_thread.join()
+                            self.__terminate()
+                        if self.__check_for_reset(event) is True:
+                            player.cancel_search()
+                            search_thread.join()
+                            self.__reset_game()
+                            return None
+                        if self.__check_for_pause(event) is True:
+                            player.cancel_search()
+                            search_thread.join()
+                            paused = True
+                            break
+                    search_thread.join(0.02)  # the search holds the interpreter lock most of the time anyway
+            finally:
+                player.board = self.game_board
+            if len(errors) > 0:
+                raise errors[0]
+            if not paused:
+                return moves[0]
+            self.__pause_game()
+            if self.player_turn != player_turn or self.players[player_turn] is not player or \
+                    self.game_board.bitboard.encode() != encoding:
+                return None
+
+    def __handle_move(self, tile_pos: tuple[int, int]):
         """
         Handle player's made move on the board
         """
-        Game.game_board.make_move(tile_pos, Game.players[Game.player_turn].token)
-        Game.game_graphics.draw_move(tile_pos, Game.players[Game.player_turn].token)
-        Game.__check_for_win(Game.player_turn)
+        self.game_board.make_move(tile_pos, self.players[self.player_turn].token)
+        self.game_graphics.draw_move(tile_pos, self.players[self.player_turn].token)
+        self.__check_for_win(self.player_turn)
 
-    @staticmethod
-    def __check_for_pause(event: pygame.event.Event) -> bool:
+    def __check_for_pause(self, event: pygame.event.Event) -> bool:
         """
         Check if settings menu should be opened
         """
-        Game.game_graphics.animate_settings_text()
+        self.game_graphics.animate_settings_text()
         if event.type == MOUSEBUTTONUP:
             click_x, click_y = event.pos
-            if Game.game_graphics.settings_text_box.collidepoint(click_x, click_y):
+            if self.game_graphics.settings_text_box.collidepoint(click_x, click_y):
                 return True
         if event.type == KEYUP:
             if event.key == K_TAB:
                 return True
         return False
 
-    @staticmethod
-    def __pause_game():
+    def __pause_game(self):
         """
         Set the game in a pause state and return safely from it 
         """
-        Game.__handle_paused_game()
-        Game.game_graphics.draw_board(Game.game_board.board)
+        self.__handle_paused_game()
+        self.game_graphics.draw_board(self.game_board.board)
 
-    @staticmethod
-    def __handle_paused_game():
+    def __handle_paused_game(self):
         """
         Open settings menu and handle pause state
         """
-        player_1_human_flag = Game.player_1.is_human()
-        player_2_human_flag = Game.player_2.is_human()
-        Game.game_graphics.draw_paused_game(player_1_human_flag, player_2_human_flag)
+        player_1_human_flag = self.player_1.is_human()
+        player_2_human_flag = self.player_2.is_human()
+        self.game_graphics.draw_paused_game(player_1_human_flag, player_2_human_flag)
 
         while True: 
             for event in pygame.event.get():
-                if Game.__check_for_quit(event) is True:
-                    Game.__terminate()
+                if self.__check_for_quit(event) is True:
+                    self.__terminate()
                 if event.type == MOUSEBUTTONUP:
                     click_x, click_y = event.pos
-                    if Game.game_graphics.player_1_human_box.collidepoint(click_x, click_y) is True:
+                    if self.game_graphics.player_1_human_box.collidepoint(click_x, click_y) is True:
                         player_1_human_flag = True
-                    if Game.game_graphics.player_1_ai_box.collidepoint(click_x, click_y) is True:
+                    if self.game_graphics.player_1_ai_box.collidepoint(click_x, click_y) is True:
                         player_1_human_flag = False
-                    if Game.game_graphics.player_2_human_box.collidepoint(click_x, click_y) is True:
+                    if self.game_graphics.player_2_human_box.collidepoint(click_x, click_y) is True:
                         player_2_human_flag = True
-                    if Game.game_graphics.player_2_ai_box.collidepoint(click_x, click_y) is True:
+                    if self.game_graphics.player_2_ai_box.collidepoint(click_x, click_y) is True:
                         player_2_human_flag = False
-                    if Game.game_graphics.go_back_box.collidepoint(click_x, click_y) is True:
+                    if self.game_graphics.go_back_box.collidepoint(click_x, click_y) is True:
                         return
-                    if Game.game_graphics.save_changes_box.collidepoint(click_x, click_y) is True:
-                        Game.__change_players(player_1_human_flag, player_2_human_flag)
-                        Game.__reset_game()
+                    if self.game_graphics.save_changes_box.collidepoint(click_x, click_y) is True:
+                        self.__change_players(player_1_human_flag, player_2_human_flag)
+                        self.__reset_game()
                         return
-                    Game.game_graphics.draw_paused_game(player_1_human_flag, player_2_human_flag)
+                    self.game_graphics.draw_paused_game(player_1_human_flag, player_2_human_flag)
 
-    @staticmethod
-    def __change_players(player_1_human_flag: bool, player_2_human_flag: bool):
+    def __change_players(self, player_1_human_flag: bool, player_2_human_flag: bool):
         """
         Instantiate new types for players chosen from selection screen
         """
+        self.player_1.close()
+        self.player_2.close()
         if player_1_human_flag is True:
-            Game.player_1 = Human_Player(1)
+            self.player_1 = Human_Player(1, self.game_board)
         else:
-            Game.player_1 = AI_Minmax_Graph_Player(1)
+            self.player_1 = AI_Minmax_Graph_Player(1, board=self.game_board)
         if player_2_human_flag is True:
-            Game.player_2 = Human_Player(2)
+            self.player_2 = Human_Player(2, self.game_board)
         else:
-            Game.player_2 = AI_Minmax_Graph_Player(2)
-        Game.players[0] = Game.player_1
-        Game.players[1] = Game.player_2
+            self.player_2 = AI_Minmax_Graph_Player(2, board=self.game_board)
+        self.players[0] = self.player_1
+        self.players[1] = self.player_2
 
     @staticmethod
     def __terminate():
@@ -221,21 +275,61 @@ class Game(object):
         pygame.quit()
         sys.exit()
 
-    @staticmethod
-    def __handle_human_move():
+    def __handle_human_move(self):
         """
         Handle initial player interactions with the active game board
         """
-        while True:  # Player loop
-            for event in pygame.event.get():
-                if Game.__check_for_quit(event) is True:
-                    Game.__terminate()
-                if Game.__check_for_reset(event) is True:
-                    Game.__reset_game()
-                    return
-                if Game.__check_for_move(event) is True:
-                    Game.__handle_move(Game.__translate_pos_to_move(event.pos))
-                    return
-                if Game.__check_for_pause(event) is True:
-                    Game.__pause_game()
-                    return
+        self.__start_pondering()
+        try:
+            while True:  # Player loop
+                for event in pygame.event.get():
+                    if self.__check_for_quit(event) is True:
+                        self.__stop_pondering()
+                        self.__terminate()
+                    if self.__check_for_reset(event) is True:
+                        self.__stop_pondering()
+                        self.__reset_game()
+                        return
+                    if self.__check_for_move(event) is True:
+                        self.__stop_pondering()
+                        self.__handle_move(self.__translate_pos_to_move(event.pos))
+                        return
+                    if self.__check_for_pause(event) is True:
+                        self.__stop_pondering()
+                        self.__pause_game()
+                        return
+        finally:
+            self.__stop_pondering()
+
+    def __start_pondering(self):
+        """
+        Let an AI opponent of the human player search on a copy of the board while the human thinks, see
+        AI_Minmax_Graph_Player.ponder
+        """
+        opponent = self.players[1 - self.player_turn]
+        if not isinstance(opponent, AI_Minmax_Graph_Player) or opponent.pondering is False:
+            return
+        self.search_board.load_position(self.game_board.bitboard.encode())
+        opponent.board = self.search_board
+        opponent.search_cancelled = False
+
+        def ponder():
+            try:
+                opponent.ponder()
+            except SearchCancelled:
+                pass
+
+        self.pondering_player = opponent
+        self.ponder_thread = threading.Thread(target=ponder, daemon=True)
+        self.ponder_thread.start()
+
+    def __stop_pondering(self):
+        """
+        Cancel the search of the pondering AI player, if any, and wait for it to stop
+        """
+        if self.ponder_thread is None:
+            return
+        self.pondering_player.cancel_search()
+        self.ponder_thread.join()
+        self.pondering_player.board = self.game_board
+        self.ponder_thread, self.pondering_player = None, None
@@ -1,3 +1,6 @@
+import copy
+
+
 # State of tile pieces in board
 UNOCCUPIED = 0
 PLAYER_1_TOKEN = 1
@@ -20,31 +23,81 @@ class HexNode(object):
         self.status: int = status
         self.node_value: int = node_value
 
-        # Variables used in the two distance evaluation function
-        self.td_value: int | None = None  # distance from source node to this current node
-        self.td_neighbour_values_list: list[int] = list()  # list of distances from source node to neighbor nodes of current node
-
 
 class HexGraph(object):
 
     hex_nodes: list[HexNode]
     board_size: int
-    edges_matrix: list[list[int]]
+    edge_offsets: list[int]
+    edge_targets: list[int]
+    edge_costs: list[int]
 
-    def __init__(self, board_size: int, hex_nodes: list[HexNode], edges_matrix: list[list[int]]):
+    def __init__(self, board_size: int, hex_nodes: list[HexNode], edges: list[tuple[int, int, int, int]]):
         """
         Initialize a graph -- structure that represents the board as a collection of linked hex nodes
+
+        edges are (node value, node value, cost from the first node, cost from the second node). They are kept in
+        compressed sparse rows: the edges leaving node v are the slots edge_offsets[v] to edge_offsets[v + 1] - 1 of
+        the flat edge_targets and edge_costs lists
         """
         self.board_size = board_size
         self.hex_nodes = hex_nodes
-        self.edges_matrix = edges_matrix
+        neighbour_costs: list[dict[int, int]] = [dict() for _ in hex_nodes]
+        for node_value_1, node_value_2, distance_for_1, distance_for_2 in edges:
+            neighbour_costs[node_value_1][node_value_2] = distance_for_1
+            neighbour_costs[node_value_2][node_value_1] = distance_for_2
+        self.edge_offsets = [0]
+        self.edge_targets = list()
+        self.edge_costs = list()
+        for costs in neighbour_costs:
+            self.edge_targets.extend(costs.keys())
+            self.edge_costs.extend(costs.values())
+            self.edge_offsets.append(len(self.edge_targets))
+        self.edge_slots = [range(self.edge_offsets[node_value], self.edge_offsets[node_value + 1])
+                           for node_value in range(len(hex_nodes))]
+        '''Slots of the edges leaving every node, kept to save building the ranges in the shortest path searches'''
+        self.reverse_edge_slots = [self.get_edge_slot(self.edge_targets[slot], node_value)
+                                   for node_value in range(len(hex_nodes)) for slot in self.edge_slots[node_value]]
+        '''Slot of the edge going the other way for every slot'''
+        self.initial_edge_costs = list(self.edge_costs)
+        '''Edge costs of the empty board'''
+
+    def copy(self, hex_nodes: list[HexNode]) -> 'HexGraph':
+        """
+        Get a graph of the empty board over other hex nodes, sharing the edges of this graph that never change
+        """
+        graph = copy.copy(self)
+        graph.hex_nodes = hex_nodes
+        graph.edge_costs = list(self.initial_edge_costs)
+        return graph
+
+    def get_edge_slot(self, node_value_1: int, node_value_2: int) -> int:
+        """
+        Get the slot of the edge from the first node to the second one
+        """
+        for slot in self.edge_slots[node_value_1]:
+            if self.edge_targets[slot] == node_value_2:
+                return slot
+        raise KeyError((node_value_1, node_value_2))
 
     def update_edge_value(self, node_value_1: int, node_value_2: int, new_distance_for_1: int, new_distance_for_2: int):
         """
         Update the path cost from two nodes
         """
-        self.edges_matrix[node_value_1][node_value_2] = new_distance_for_1
-        self.edges_matrix[node_value_2][node_value_1] = new_distance_for_2
+        self.update_edge_slot(self.get_edge_slot(node_value_1, node_value_2), new_distance_for_1, new_distance_for_2)
+
+    def update_edge_slot(self, slot: int, new_distance: int, new_reverse_distance: int):
+        """
+        Update the path cost of the edge in slot and of the edge going the other way
+        """
+        self.edge_costs[slot] = new_distance
+        self.edge_costs[self.reverse_edge_slots[slot]] = new_reverse_distance
+
+    def reset_edge_costs(self):
+        """
+        Set the path costs back to those of the empty board
+        """
+        self.edge_costs[:] = self.initial_edge_costs
 
     def get_first_column_tiles(self, player_token: int) -> list[HexNode]:
         """
@@ -57,12 +110,3 @@ class HexGraph(object):
         Get the tiles in the first row not occupied by opponent
         """
         return [node for node in self.hex_nodes if node.node_value < self.board_size and node.status in [player_token, UNOCCUPIED]]
-
-    def reset_td_values(self):
-        """
-        Reset the values used in two distance heuristic for self node
-        """
-        for node in self.hex_nodes:
-            node.td_value = None
-            node.td_neighbour_values_list = list()
-            
\ No newline at end of file
@@ -0,0 +1,65 @@
+from board import *
+
+
+CORNER = 3
+'''Status of the off board neighbour of an obtuse corner tile, which lies beyond two borders and helps neither player'''
+BORDER_STATUSES = (PLAYER_1_TOKEN, PLAYER_2_TOKEN, CORNER)
+'''Statuses appended to the flat tile statuses for the off board neighbours of the border tiles'''
+
+
+def is_dead_pattern(ring: tuple[int, ...]) -> bool:
+    """
+    Check if an empty tile with the given neighbour statuses, in RING_OFFSETS order (see board_geometry.py), is dead
+
+    A tile is useless to a player when any two neighbours the player can use that are not adjacent are already joined
+    through the player's tokens around the tile: a shortest winning path of the player never goes through it, since it
+    can go from one neighbour to the other without it. Off board neighbours count as tokens of the owner of the border.
+    A tile useless to both players is dead, the winner is the same whoever takes it
+    """
+    for player_token in (PLAYER_1_TOKEN, PLAYER_2_TOKEN):
+        usable = [index for index in range(6) if ring[index] in (UNOCCUPIED, player_token)]
+        for first in usable:
+            for second in usable:
+                gap = (second - first) % 6
+                if gap < 2:
+                    continue
+                # Joined going around from first to second in either direction
+                if all(ring[(first + step) % 6] == player_token for step in range(1, gap)):
+                    continue
+                if all(ring[(first - step) % 6] == player_token for step in range(1, 6 - gap)):
+                    continue
+                return False
+    return True
+
+
+DEAD_PATTERNS = [is_dead_pattern(tuple(code >> (2 * index) & 3 for index in range(6))) for code in range(4 ** 6)]
+'''Whether an empty tile is dead for every code of its neighbourhood, the status of the k-th neighbour times 4 ** k'''
+
+
+def get_dead_cells(board: Board) -> int:
+    """
+    Get the mask of the dead empty tiles, tile (i, j) being bit i * board_size + j like in BitBoard
+
+    A dead tile is filled, with a token of player 1 as its colour doesn't matter, and its empty neighbours are looked at
+    again: tiles dead once the others are filled are dead as well
+    """
+    board_size = board.board_size
+    num_tiles = board_size * board_size
+    ring_indices = board.geometry.ring_indices
+    statuses = board.board.ravel().tolist()
+    statuses.extend(BORDER_STATUSES)
+    dead_cells = 0
+    candidates = [tile for tile in range(num_tiles) if statuses[tile] == UNOCCUPIED]
+    while len(candidates) > 0:
+        tile = candidates.pop()
+        if statuses[tile] != UNOCCUPIED:
+            continue
+        n0, n1, n2, n3, n4, n5 = ring_indices[tile]
+        code = statuses[n0] + 4 * statuses[n1] + 16 * statuses[n2] + 64 * statuses[n3] + 256 * statuses[n4] \
+            + 1024 * statuses[n5]
+        if DEAD_PATTERNS[code]:
+            dead_cells |= 1 << tile
+            statuses[tile] = PLAYER_1_TOKEN
+            candidates.extend(neighbour for neighbour in ring_indices[tile]
+                              if neighbour < num_tiles and statuses[neighbour] == UNOCCUPIED)
+    return dead_cells
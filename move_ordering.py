@@ -0,0 +1,109 @@
+import heapq, time
+from typing import Callable, Iterator
+from board import Board
+from inferior_cells import get_dead_cells
+from search_stats import SearchStats
+from virtual_connections import get_must_play
+
+
+class MoveOrdering(object):
+    """
+    Killer moves and history heuristic learned from the cutoffs of a search, used to order the moves of later nodes
+
+    Killer moves are the latest moves that caused a cutoff at a depth, the history counts cutoffs per tile weighted by
+    the square of the depth searched below them
+    """
+
+    def __init__(self, num_killers: int = 2, prune_dead_cells: bool = True, restrict_to_must_play: bool = True):
+        """
+        Initialize an ordering that hasn't learned anything yet
+        """
+        self.num_killers = num_killers
+        self.prune_dead_cells = prune_dead_cells
+        '''Whether dead tiles are left out of the moves, see inferior_cells.py'''
+        self.restrict_to_must_play = restrict_to_must_play
+        '''Whether the moves are restricted to the tiles stopping the virtual wins of the opponent, see
+        virtual_connections.py'''
+        self.killers: list[list[tuple[int, int]]] = list()
+        '''Killer moves of every depth, most recent first'''
+        self.history: dict[tuple[int, int], int] = dict()
+
+    def new_search(self):
+        """
+        Prepare for the search of a new move: depths are counted from another root, and older history counts less
+        """
+        self.killers = list()
+        self.history = {tile: value // 2 for tile, value in self.history.items() if value > 1}
+
+    def add_cutoff(self, move: tuple[int, int], depth: int, remaining_depth: int):
+        """
+        Learn from a move that caused a cutoff at given depth with remaining_depth plies searched below the node
+        """
+        while len(self.killers) <= depth:
+            self.killers.append(list())
+        killers = self.killers[depth]
+        if move in killers:
+            killers.remove(move)
+        killers.insert(0, move)
+        del killers[self.num_killers:]
+        self.history[move] = self.history.get(move, 0) + remaining_depth * remaining_depth
+
+    def get_pruned_tiles(self, board: Board, player_token: int, stats: SearchStats | None = None) -> int:
+        """
+        Get the mask of the empty tiles left out of the moves of player in the position: those out of the must-play
+        region when the opponent has a virtual win, then the dead ones unless no other tile is left
+        """
+        empty = board.bitboard.get_empty_mask()
+        moves = empty
+        if self.restrict_to_must_play:
+            must_play = get_must_play(board.bitboard, player_token)
+            if must_play is not None:
+                moves = must_play
+                if stats is not None:
+                    stats.must_play_pruned += (empty & ~must_play).bit_count()
+        if self.prune_dead_cells:
+            dead_cells = get_dead_cells(board) & moves
+            if dead_cells != moves:
+                moves &= ~dead_cells
+                if stats is not None:
+                    stats.dead_cells += dead_cells.bit_count()
+        return empty & ~moves
+
+    def generate_moves(self, board: Board, player_token: int, depth: int, tt_move: tuple[int, int] | None,
+                       key: Callable[[tuple[int, int]], float], stats: SearchStats | None = None
+                       ) -> Iterator[tuple[int, int]]:
+        """
+        Yield the moves of player but the pruned tiles: the transposition table move, the killer moves of the depth,
+        then the other tiles by decreasing history, ties broken by increasing key
+
+        Each stage is only prepared when the previous ones are exhausted, so a cutoff on an early move saves building
+        and ordering the whole list; the rest is ordered lazily with a heap. The board must be back in the position of
+        the node whenever the next move is asked for. The transposition table move is yielded before the pruned tiles
+        are computed: it was generated by a search of the same position, so only its tile is checked to be empty
+        """
+        board_size = board.board_size
+        yielded: list[tuple[int, int]] = list()
+        if tt_move is not None and not board.is_tile_occupied(tt_move):
+            yielded.append(tt_move)
+            yield tt_move
+
+        start = time.perf_counter()
+        pruned_tiles = self.get_pruned_tiles(board, player_token, stats)
+        if stats is not None:
+            stats.add_time('move_generation', start)
+        if depth < len(self.killers):
+            for killer in list(self.killers[depth]):  # sibling subtrees can replace the killers meanwhile
+                if killer not in yielded and not board.is_tile_occupied(killer) \
+                        and not pruned_tiles >> (killer[0] * board_size + killer[1]) & 1:
+                    yielded.append(killer)
+                    yield killer
+
+        start = time.perf_counter()
+        history = self.history
+        remaining = [(-history.get(tile, 0), key(tile), tile) for tile in board.get_unoccupied_tiles()
+                     if tile not in yielded and not pruned_tiles >> (tile[0] * board_size + tile[1]) & 1]
+        heapq.heapify(remaining)
+        if stats is not None:
+            stats.add_time('move_generation', start)
+        while len(remaining) > 0:
+            yield heapq.heappop(remaining)[2]
@@ -0,0 +1,115 @@
+import mmap, os, struct
+from board import *
+
+
+OPENING_BOOK_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'opening_books')
+'''Directory the players look for the opening book of every board size in, see build_opening_book.py'''
+HEADER = struct.Struct('<8sII')
+'''Magic bytes, board size and number of entries'''
+ENTRY = struct.Struct('<QHf')
+'''Zobrist key of the position, move as a flat tile index and score; entries are sorted by key'''
+MAGIC = b'HEXBOOK1'
+
+
+def get_opening_book_path(board_size: int) -> str:
+    """
+    Get the path of the opening book file of a board size
+    """
+    return os.path.join(OPENING_BOOK_DIRECTORY, f'hex_{board_size}.book')
+
+
+def get_rotated_key(board: Board) -> int:
+    """
+    Get the Zobrist key of the position rotated by 180 degrees, which is as good for the same player
+    """
+    key = 0
+    last_tile = board.num_nodes - 1
+    for player_token in (PLAYER_1_TOKEN, PLAYER_2_TOKEN):
+        for row, column in board.get_occupied_tiles(player_token):
+            key ^= board.zobrist_tile_keys[last_tile - row * board.board_size - column][player_token]
+    return key
+
+
+def write_opening_book(path: str, board_size: int, entries: dict[int, tuple[tuple[int, int], float]]):
+    """
+    Write the book moves and scores of positions, given by Zobrist key, to an opening book file
+    """
+    with open(path, 'wb') as book_file:
+        book_file.write(HEADER.pack(MAGIC, board_size, len(entries)))
+        for key in sorted(entries):
+            (row, column), score = entries[key]
+            book_file.write(ENTRY.pack(key, row * board_size + column, score))
+
+
+class OpeningBook(object):
+    """
+    Best moves of opening positions searched offline, read from a memory mapped file
+
+    Lookups binary search the sorted entries in place, so the book is never copied into memory
+    """
+
+    def __init__(self, path: str):
+        """
+        Map an opening book file written by write_opening_book
+        """
+        with open(path, 'rb') as book_file:
+            self.data = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.board_size, self.num_entries = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            self.data.close()
+            raise ValueError(f'{path} is not an opening book file')
+
+    def load(self, key: int) -> tuple[int, float] | None:
+        """
+        Get the flat tile index of the book move and its score for the position with given Zobrist key, if any
+        """
+        low, high = 0, self.num_entries
+        while low < high:
+            middle = (low + high) // 2
+            entry_key, move, score = ENTRY.unpack_from(self.data, HEADER.size + middle * ENTRY.size)
+            if entry_key == key:
+                return move, score
+            if entry_key < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def get_move(self, board: Board) -> tuple[int, int] | None:
+        """
+        Get the book move of the position on the board, or None when the position is not in the book
+        """
+        if board.board_size != self.board_size:
+            return None
+        entry = self.load(board.zobrist_key)
+        if entry is not None:
+            tile_pos = divmod(entry[0], self.board_size)
+        else:
+            entry = self.load(get_rotated_key(board))
+            if entry is None:
+                return None
+            row, column = divmod(entry[0], self.board_size)
+            tile_pos = (self.board_size - 1 - row, self.board_size - 1 - column)
+        if board.is_tile_occupied(tile_pos):  # only happens for a hash collision
+            return None
+        return tile_pos
+
+    def close(self):
+        """
+        Unmap the book file
+        """
+        self.data.close()
+
+
+opening_books: dict[int, OpeningBook | None] = dict()
+'''Opening book of every board size opened by this process, None when there is no book file'''
+
+
+def get_opening_book(board_size: int) -> OpeningBook | None:
+    """
+    Get the opening book of a board size from OPENING_BOOK_DIRECTORY, opening it on first use
+    """
+    if board_size not in opening_books:
+        path = get_opening_book_path(board_size)
+        opening_books[board_size] = OpeningBook(path) if os.path.exists(path) else None
+    return opening_books[board_size]
@@ -1,6 +1,28 @@
-import pygame, random
+import math, multiprocessing, random, time
+from concurrent.futures import ProcessPoolExecutor
 from board import *
+from bitboard import BitBoard
 from graph import *
+from transposition import *
+from shortest_path import get_border_distance, get_graph_distance, get_two_distance
+from batch_evaluation import evaluate_children
+from search_stats import SearchStats
+from move_ordering import MoveOrdering
+from opening_book import get_opening_book
+from proof_number_search import ProofNumberSolver, SMALL_BOARD_SIZE
+from typing import Callable
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside a search when the time budget for the current move is used up
+    """
+
+
+class SearchCancelled(SearchTimeout):
+    """
+    Raised inside a search when AI_Player.cancel_search was called, searches stop on it like on a timeout
+    """
 
 
 class Player(object):
@@ -8,8 +30,10 @@ class Player(object):
     Base player class
     """
 
-    def __init__(self, token: int):
+    def __init__(self, token: int, board: Board | None = None):
         self.token = token
+        self.board = board
+        '''Board the player thinks about, set by the game the player takes part in'''
 
     def is_human(self) -> bool:
         raise NotImplementedError('Method should be overriden')
@@ -20,11 +44,16 @@ class Player(object):
     def get_move(self):
         raise NotImplementedError('Method should be overriden')
 
+    def close(self):
+        """
+        Release the worker processes and shared memory of the player, it can't be used afterwards
+        """
+
 
 class Human_Player(Player):
 
-    def __init__(self, token: int):
-        super().__init__(token)
+    def __init__(self, token: int, board: Board | None = None):
+        super().__init__(token, board)
     
     def is_human(self) -> bool:
         return True
@@ -38,8 +67,14 @@ class Human_Player(Player):
 
 class AI_Player(Player):
 
-    def __init__(self, token: int):
-        super().__init__(token)
+    def __init__(self, token: int, board: Board | None = None):
+        super().__init__(token, board)
+        self.search_stats = SearchStats()
+        '''Statistics of the search for the last move'''
+        self.stats_callback: Callable[[int, SearchStats], None] | None = None
+        '''Called with the player token and the search statistics after every move, see SearchStatsLog'''
+        self.search_cancelled = False
+        '''Set from another thread by cancel_search, checked by the search at every node'''
     
     def is_human(self) -> bool:
         return False
@@ -53,33 +88,56 @@ class AI_Player(Player):
         """
         raise NotImplementedError("Method should be overriden")
 
+    def cancel_search(self):
+        """
+        Ask the search running in another thread to stop, it raises SearchCancelled at the next node
+
+        The flag stays set until the caller clears search_cancelled before the next search
+        """
+        self.search_cancelled = True
+
+    def report_search_stats(self, start: float):
+        """
+        Complete the statistics of a move whose search began at start, a time.perf_counter value, and pass them on
+        """
+        self.search_stats.total_time = time.perf_counter() - start
+        if self.stats_callback is not None:
+            self.stats_callback(self.token, self.search_stats)
+
 
 class AI_Random_Player(AI_Player):
     
-    def __init__(self, token: int):
-        super().__init__(token)
+    def __init__(self, token: int, board: Board | None = None):
+        super().__init__(token, board)
     
     def get_move(self) -> tuple[int, int]:
         """
         Get a random unocupied tile
         """
-        possible_moves = Board.get_unoccupied_tiles()
+        possible_moves = self.board.get_unoccupied_tiles()
         return possible_moves[random.randint(0, len(possible_moves) - 1)]
 
 
 class AI_Minmax_Player(AI_Player):
 
-    def __init__(self, token: int):
-        super().__init__(token)
+    def __init__(self, token: int, board: Board | None = None, prune_dead_cells: bool = True,
+                 restrict_to_must_play: bool = True):
+        super().__init__(token, board)
         self.max_depth = 3
+        self.move_ordering = MoveOrdering(prune_dead_cells=prune_dead_cells, restrict_to_must_play=restrict_to_must_play)
         assert self.max_depth > 0
+        self.transposition_table = TranspositionTable()
     
     def get_move(self) -> tuple[int, int]:
         """
         Get best move using minmax algorithm with alpha beta pruning
         """
+        self.search_stats = SearchStats()
+        self.move_ordering.new_search()
+        start = time.perf_counter()
         _, best_move = self.alpha_beta_pruned_minmax(player_token=self.token,
                                                        is_maximizing_player=True, current_depth=0)
+        self.report_search_stats(start)
         return best_move
 
     def alpha_beta_pruned_minmax(self, player_token: int, is_maximizing_player: bool, current_depth: int,
@@ -89,57 +147,72 @@ class AI_Minmax_Player(AI_Player):
 
         Return the best state's score and the best tile position
         """
-        pygame.event.clear()  # Trick computer into thinking events are being handled
-        # result_list: list[tuple[int, int]] = list()
-
-        # state_str = Board.get_board_string()
-        # if state_str in transposition_table:  
-        #     if current_depth in transposition_table[state_str]:  # State has already been evaluated at that depth
-        #         return load(state_str, current_depth)
+        if self.search_cancelled:
+            raise SearchCancelled()
+
+        stats = self.search_stats
+        stats.add_node(current_depth)
+
+        # The root is always searched so that the shuffled move order keeps the AI unpredictable
+        state_key = self.board.get_search_key(current_depth)
+        remaining_depth = self.max_depth - current_depth
+        entry = None
+        if current_depth > 0:
+            entry = self.transposition_table.load(state_key)
+            stats.tt_probes += 1
+            stats.tt_hits += entry is not None
+        cutoff_value = get_cutoff_value(entry, remaining_depth, alpha, beta)
+        if cutoff_value is not None:
+            stats.tt_cutoffs += 1
+            return cutoff_value, entry[3] or (None, None)
  
+        # Successors come staged: the best move of an earlier visit, the killer moves, then by history
+        # Ties in the history are broken
         # 1. AT RANDOM
-        successor_moves = [(i, j) for j in range(Board.board_size) for i in range(Board.board_size) if Board.board[i, j] == UNOCCUPIED]
-        random.shuffle(successor_moves)       
-        
+        tie_break = lambda tile: random.random()
+
         # 2. BY CENTRALITY
-        # Sort successor moves by how close to the center of the board they are (center moves tend to do better at the start)
-        # successor_moves = sorted(
-        #     [(i, j) for j in range(Board.board_size) for i in range(Board.board_size) if Board.board[i, j] == UNOCCUPIED], 
-        #     key=lambda x: abs(x[0] - (Board.board_size - 1)/2) + abs(x[1] - (Board.board_size - 1)/2) + random.random() / 4 
-        # )
+        # Center moves tend to do better at the start
+        # tie_break = lambda x: abs(x[0] - (self.board.board_size - 1)/2) + abs(x[1] - (self.board.board_size - 1)/2) + random.random() / 4
 
         # 3. BY DIAGONALITY
-        # successor_moves = sorted(
-        #     [(i, j) for j in range(Board.board_size) for i in range(Board.board_size) if Board.board[i, j] == UNOCCUPIED], 
-        #     key=lambda x: abs(x[0] + x[1] - (Board.board_size - 1) + random.random() / 4)
-        # )
-
+        # tie_break = lambda x: abs(x[0] + x[1] - (self.board.board_size - 1) + random.random() / 4)
 
+        tt_move = entry[3] if entry is not None else None
+        successor_moves = self.move_ordering.generate_moves(self.board, player_token, current_depth, tt_move, tie_break,
+                                                            stats)
 
-        # If the player can win in one move, choose that move
-        if current_depth == 1:
-            result = self.evaluate_score(self.token, current_depth)
-            if result == 9999:  # 10000 - num_turns == victory 
-                return float('inf'), (None, None)
+        # Positions where a player has already won are terminal at any depth
+        win_token = self.board.get_win_token() if current_depth > 0 else None
+        if win_token is not None:
+            result = float('inf') if win_token == self.token else float('-inf')
+            self.transposition_table.store(state_key, remaining_depth, result, EXACT, None)
+            return result, (None, None)
 
         # If it is a leaf node, evaluate it
-        if current_depth == self.max_depth or len(successor_moves) == 0:
+        if current_depth == self.max_depth or self.board.bitboard.get_num_empty_tiles() == 0:
+            stats.leaf_evaluations += 1
+            start = time.perf_counter()
             evaluation = self.evaluate_score(self.token, current_depth)
-            if evaluation <= 1:
-                return evaluation, (None, None)
-            return 2 * evaluation + Board.get_bridge_reward(self.token) - Board.get_bridge_reward(1 if self.token == 2 else 2), (None, None)
+            stats.add_time('evaluation', start)
+            if evaluation > 1:
+                start = time.perf_counter()
+                evaluation = 2 * evaluation + self.board.get_bridge_reward(self.token) - self.board.get_bridge_reward(1 if self.token == 2 else 2)
+                stats.add_time('bridge_reward', start)
+            self.transposition_table.store(state_key, remaining_depth, evaluation, EXACT, None)
+            return evaluation, (None, None)
         
         opponent_token = 1 if player_token == 2 else 2
+        alpha_original, beta_original = alpha, beta
 
         # Main alpha beta algorithm
         if is_maximizing_player is True:
             result_value, result_move = float('-inf'), (None, None)
-            for successor_move in successor_moves:
-                s_i, s_j = successor_move
-                Board.board[s_i, s_j] = player_token
+            for index, successor_move in enumerate(successor_moves):
+                self.board.make_move(successor_move, player_token)
                 best_value, _ = self.alpha_beta_pruned_minmax(player_token=opponent_token, is_maximizing_player=False, 
                                                               current_depth=current_depth + 1, alpha=alpha, beta=beta)
-                Board.board[s_i, s_j] = UNOCCUPIED
+                self.board.remove_move(successor_move)
                 if best_value == result_value == float('-inf'):
                     result_move = successor_move
                 if best_value > result_value:
@@ -149,17 +222,16 @@ class AI_Minmax_Player(AI_Player):
                 alpha = max(alpha, best_value)
                 
                 if beta <= alpha:
+                    stats.add_cutoff(index)
+                    self.move_ordering.add_cutoff(successor_move, current_depth, remaining_depth)
                     break
-            # store(state_str, current_depth, result_value, result_list)
-            return result_value, result_move
         else:
             result_value, result_move = float('inf'), (None, None)
-            for successor_move in successor_moves:
-                s_i, s_j = successor_move
-                Board.board[s_i, s_j] = player_token
+            for index, successor_move in enumerate(successor_moves):
+                self.board.make_move(successor_move, player_token)
                 best_value, _ = self.alpha_beta_pruned_minmax(player_token=opponent_token, is_maximizing_player=True, 
                                                               current_depth=current_depth + 1, alpha=alpha, beta=beta)
-                Board.board[s_i, s_j] = UNOCCUPIED
+                self.board.remove_move(successor_move)
                 if best_value == result_value == float('inf'):
                     result_move = successor_move
                 if best_value < result_value:
@@ -168,9 +240,12 @@ class AI_Minmax_Player(AI_Player):
                 beta = min(beta, best_value)
 
                 if beta <= alpha:
+                    stats.add_cutoff(index)
+                    self.move_ordering.add_cutoff(successor_move, current_depth, remaining_depth)
                     break
-            # store(state_str, current_depth, result_value, result_list)
-            return result_value, result_move
+        self.transposition_table.store(state_key, remaining_depth, result_value,
+                                       get_bound(result_value, alpha_original, beta_original), result_move)
+        return result_value, result_move
 
     def evaluate_score(self, player_token: int, num_turns: int):
         """
@@ -190,74 +265,7 @@ class AI_Minmax_Player(AI_Player):
 
         Return the minimal number of tiles needed to make a winning path on current state
         """
-        return self.__dijkstra(player_token)
-
-    def __dijkstra(self, player_token: int) -> float:
-        """
-        Calculate and return shortest distance from source node to opposite border
-        """
-        distances = [[10000 for _ in range(Board.board_size)] for _ in range(Board.board_size)]
-        queue = [(i, j) for j in range(Board.board_size) for i in range(Board.board_size)]
-        sink_position = 1 if player_token == 1 else 0  # Denotes if algorithm should move towards last column or last row
-
-        # Start dijkstra for source node 
-        opponent_token = 1 if player_token == 2 else 2
-        neighbors: list[tuple[int, int]] 
-
-        if player_token == PLAYER_1_TOKEN:
-            neighbors = [(i, 0) for i in range(Board.board_size) if Board.board[i, 0] != opponent_token]
-        else:
-            neighbors = [(0, i) for i in range(Board.board_size) if Board.board[0, i] != opponent_token]
-        
-        for neighbor in neighbors:
-            if neighbor in queue:
-                n_i, n_j = neighbor
-                new_distance = 0 if Board.board[n_i, n_j] == player_token else 1
-                if new_distance < distances[n_i][n_j]:
-                    distances[n_i][n_j] = new_distance
-                if neighbor[sink_position] == Board.board_size - 1:
-                    return distances[n_i][n_j]
-
-        # continue dijsktra for other nodes
-        while len(queue) > 0:
-            i, j = self.__get_min_distance_pos_in_queue(queue, distances)
-            if i is None:
-                break
-            queue.remove((i, j))
-
-            for neighbor in self.__get_neighboring_nodes((i, j), player_token):
-                if neighbor in queue:
-                    n_i, n_j = neighbor
-                    new_distance = distances[i][j] + (0 if Board.board[n_i, n_j] == player_token else 1)
-                    if new_distance < distances[n_i][n_j]:
-                        distances[n_i][n_j] = new_distance
-                    if neighbor[sink_position] == Board.board_size - 1:
-                        return distances[n_i][n_j]
-            
-        return 10000
-
-    def __get_min_distance_pos_in_queue(self, queue: list[tuple[int, int]], distances: list[list[float]]) -> tuple[int, int]:
-        """
-        Get the node position with the smallest distance in 'distances' 
-        """
-        resulting_i: int | None = None
-        resulting_j: int | None = None
-        min_distance: float = float('inf')
-        if len(queue) == 1:
-            return queue[0]
-        for (i, j) in queue:
-            if distances[i][j] < min_distance:
-                min_distance = distances[i][j]
-                resulting_i, resulting_j = i, j
-        return resulting_i, resulting_j
-    
-    def __get_neighboring_nodes(self, current_node: tuple[int, int], player_token: int) -> list[tuple[int, int]]:
-        """
-        Return neighboring nodes of a given node that are NOT occupied by the opponent
-        """
-        opponent_token = 1 if player_token == 2 else 2
-
-        return [(n_i, n_j) for (n_i, n_j) in adjacent_neighbors_dict[current_node] if Board.board[n_i, n_j] != opponent_token]
+        return get_border_distance(self.board, player_token)
 
 
 class AI_Minmax_Graph_Player(AI_Player):
@@ -265,9 +273,9 @@ class AI_Minmax_Graph_Player(AI_Player):
     def start_dijkstra(self, player: int) -> int | float:
         source_nodes: list[HexNode]
         if player == 1:  # player goal is to connect left and right side of the board
-            source_node = Board.hex_nodes_by_position['L']
+            source_node = self.board.hex_nodes_by_position['L']
         else:  # players goal is to connect top and bottom side of the board
-            source_node = Board.hex_nodes_by_position['U']
+            source_node = self.board.hex_nodes_by_position['U']
         resulting_min_distance = self.dijkstra(source_node, player)
         """
         min_distance: int
@@ -280,214 +288,257 @@ class AI_Minmax_Graph_Player(AI_Player):
         """
         return resulting_min_distance
 
-    def find_node_with_min_distance(self, list_nodes: list[HexNode], distances: list[int]) -> HexNode:
-        minimum = float("inf")
-        found_node = list_nodes[0]
-        for node in list_nodes:
-            if distances[node.node_value] < minimum:
-                minimum = distances[node.node_value]
-                found_node = node
-        return found_node
-
     def dijkstra(self, source: HexNode, player_token: int) -> int | float:
-        distances: list[int | float]
-        queue: list[HexNode]
-        distances = list()
-        queue = list()
-        for node in Board.graph.hex_nodes:
-            distances.append(float("inf"))
-            queue.append(node)
-        distances[source.node_value] = 0
-
-        while len(queue) > 0:
-            current_node = self.find_node_with_min_distance(queue, distances)
-            queue.remove(current_node)
-
-            neighbours = Board.find_all_neighbour_nodes(current_node, player_token)
-            for neighbour in neighbours:
-                if neighbour in queue:
-                    new_distance = distances[current_node.node_value] + \
-                                   Board.graph.edges_matrix[current_node.node_value][neighbour.node_value]
-                    if new_distance < distances[neighbour.node_value]:
-                        distances[neighbour.node_value] = new_distance
-        board_size: int = Board.board_size
-        num_nodes: int = Board.num_nodes
-        """
-        if player_token == PLAYER_1_TOKEN:
-            resulting_distances = [distances[i] for i in range(len(distances)) if i % board_size == board_size - 1]
-        else: #last row
-            num_nodes = board_size * board_size
-            resulting_distances = [distances[i] for i in range(num_nodes - board_size, num_nodes)]
-        return resulting_distances
-        """
-        if player_token == PLAYER_1_TOKEN:  # result is distance to RIGHT node
-            return distances[num_nodes + RIGHT]
-        else:  # result is distance to DOWN node
-            return distances[num_nodes + DOWN]
-
-    def find_chain(self, player, current_node) -> set[HexNode]:
-        chain_set: set[HexNode] = set()
-        visited: list[HexNode] = list()
-        chain_set.add(current_node)
-        visited.append(current_node)
-        values = list()
-        values.append(current_node.node_value)
-        neighbouring_nodes: list[HexNode] = Board.find_all_neighbour_nodes(current_node, player)
-        neighbour_values = list()
-        for node in neighbouring_nodes:
-            neighbour_values.append(node.node_value)
-        while len(neighbouring_nodes) > 0:
-            neighbour_node = neighbouring_nodes.pop(0)
-            if neighbour_node not in visited:
-                visited.append(neighbour_node)
-                if neighbour_node.status == player:
-                    chain_set.add(neighbour_node)
-                    values.append(neighbour_node.node_value)
-                    neighbouring_nodes.extend(Board.find_all_neighbour_nodes(neighbour_node, player))
-        return chain_set
-
-    def find_neighbourhood_nodes(self, starting_node, player_token):
-        resulting_set: set[HexNode] = set()
-        chain_for_node = self.find_chain(player_token, starting_node)
-        for node in chain_for_node:
-            neighbours = Board.find_all_neighbour_nodes(node, UNOCCUPIED)
-            for neighbour in neighbours:
-                resulting_set.add(neighbour)
-        return resulting_set
-
-    def __find_two_smalest(self, neighbour_values: list[int]) -> list[int]:
-        neighbour_values.sort()
-        return neighbour_values[0:2]
-
-    def __get_final_two_distance_result(self, end_node: HexNode, player_token: int):
-        neighbours = Board.find_all_neighbour_nodes(end_node, player_token)
-        num_neighbours = len(neighbours)
-        if num_neighbours < 2:
-            return None
-        neighbour_values = list()
-        for neighbour in neighbours:
-            if neighbour.td_value != None:
-                neighbour_values.append(min(neighbour.td_neighbour_values_list) + 1)
-        two_smallest = self.__find_two_smalest(neighbour_values)
-        if len(two_smallest) < 2:
-            return None
-        return max(self.__find_two_smalest(neighbour_values)) + 1
-
-    def __get_two_distance_score(self, node_one_position: HexNode, node_two_position: HexNode, player_token: int):
-        queue: list[HexNode] = list()
-        start_node = node_one_position
-        end_node = node_two_position
-        neighbourhood_nodes = self.find_neighbourhood_nodes(start_node, player_token)
-        neighbourhood_nodes_values = list()
-        for neighbour in neighbourhood_nodes:
-            neighbour.td_value = 1
-            neighbour.td_neighbour_values_list.extend([0, 0])
-            neighbourhood_nodes_values.append(neighbour.node_value)
-            queue.append(neighbour)
-        while len(queue) > 0:
-            current_node = queue.pop(0)
-            current_neighbourhood_nodes = self.find_neighbourhood_nodes(current_node, player_token)
-            current_neighbourhood_nodes_values = list()
-            for neighbour in current_neighbourhood_nodes:
-                current_neighbourhood_nodes_values.append(neighbour.node_value)
-                if neighbour.td_value == None:
-                    neighbour.td_neighbour_values_list.append(min(current_node.td_neighbour_values_list) + 1)
-                    if len(neighbour.td_neighbour_values_list) > 1:
-                        neighbour.td_value = max(neighbour.td_neighbour_values_list) + 1
-                        queue.append(neighbour)
-        result = self.__get_final_two_distance_result(end_node, player_token)
-        if result != None:
-            Board.graph.reset_td_values()
-            return result
-        if len(end_node.td_neighbour_values_list) == 1:
-            Board.graph.reset_td_values()
-            return 5000
-        Board.graph.reset_td_values()
-        custom_player = AI_Minmax_Player(player_token)
-        return 2 * custom_player.get_dijkstra_score(player_token)
+        return get_graph_distance(self.board, source.node_value, player_token)
+
+    def get_two_distance_score(self, player_token: int) -> int:
+        """
+        Get the two distance of the player between its borders, see get_two_distance
+
+        When the target border has fewer than two neighbours with a two distance, twice the shortest path estimate of
+        AI_Minmax_Player is used instead
+        """
+        result = get_two_distance(self.board, player_token)
+        if result is None:
+            return 2 * get_border_distance(self.board, player_token)
+        return result
 
     def evaluate_score(self, player_token: int, num_turns: int):
         if player_token == 1:
             opponent_token = 2
-            player_start_node = Board.hex_nodes_by_position['L']
-            opponent_start_node = Board.hex_nodes_by_position['U']
+            player_start_node = self.board.hex_nodes_by_position['L']
+            opponent_start_node = self.board.hex_nodes_by_position['U']
         else:
             opponent_token = 1
-            player_start_node = Board.hex_nodes_by_position['U']
-            opponent_start_node = Board.hex_nodes_by_position['L']
+            player_start_node = self.board.hex_nodes_by_position['U']
+            opponent_start_node = self.board.hex_nodes_by_position['L']
         opponent_score = self.dijkstra(opponent_start_node, opponent_token)
         player_score = self.dijkstra(player_start_node, player_token)
         evaluation = opponent_score - player_score - num_turns
         return evaluation
 
     def evaluate_score_two_distance(self, player_token: int, num_turns: int):
-        if player_token == 1:
-            opponent_token = 2
-            player_start_node = Board.hex_nodes_by_position['L']
-            player_end_node = Board.hex_nodes_by_position['R']
-            opponent_start_node = Board.hex_nodes_by_position['U']
-            opponent_end_node = Board.hex_nodes_by_position['D']
-        else:
-            opponent_token = 1
-            player_start_node = Board.hex_nodes_by_position['U']
-            player_end_node = Board.hex_nodes_by_position['D']
-            opponent_start_node = Board.hex_nodes_by_position['L']
-            opponent_end_node = Board.hex_nodes_by_position['R']
-        opponent_score = self.__get_two_distance_score(opponent_start_node, opponent_end_node, opponent_token)
-        player_score = self.__get_two_distance_score(player_start_node, player_end_node, player_token)
+        opponent_token = 1 if player_token == 2 else 2
+        opponent_score = self.get_two_distance_score(opponent_token)
+        player_score = self.get_two_distance_score(player_token)
         evaluation = opponent_score - player_score - num_turns
         return evaluation
 
     def get_moves(self):
-        return Board.get_available_nodes()
+        return self.board.get_available_nodes()
+
+    def get_centrality(self, tile_pos: tuple[int, int]) -> float:
+        """
+        Get the Manhattan distance of a tile to the center of the board, center moves tend to do better
+        """
+        return self.board.geometry.centralities[tile_pos[0] * self.board.board_size + tile_pos[1]]
 
     def alpha_beta_pruned_minimax(self, depth: int, isMaximizingPlayer: bool, alpha: float, beta: float,
                                   player_token: int, max_depth: int = 3):
-        pygame.event.clear()
-        successors = sorted(self.get_moves(), key=lambda x: abs(x.position[0] - (Board.board_size - 1)/2) + abs(x.position[1] - (Board.board_size - 1)/2))
+        if self.search_cancelled:
+            raise SearchCancelled()
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        if self.search_generation is not None and self.transposition_table.get_generation() != self.search_generation:
+            raise SearchTimeout()  # the search this helper was started for is over
+        stats = self.search_stats
+        stats.add_node(depth)
+        state_key = self.board.get_search_key(depth)
+        remaining_depth = max_depth - depth
+        entry = self.transposition_table.load(state_key)
+        stats.tt_probes += 1
+        stats.tt_hits += entry is not None
+        cutoff_value = get_cutoff_value(entry, remaining_depth, alpha, beta)
+        if cutoff_value is not None:
+            stats.tt_cutoffs += 1
+            return cutoff_value
+
+        # Positions where a player has already won are terminal at any depth
+        win_token = self.board.get_win_token()
+        if win_token is not None:
+            evaluation = self.get_win_value(win_token, depth)
+            self.transposition_table.store(state_key, remaining_depth, evaluation, EXACT, None)
+            return evaluation
 
         new_player_token = 1 if player_token == 2 else 2
 
-        if depth == max_depth or len(successors) == 0:
-            evaluation = self.evaluate_score_two_distance(self.token, depth)
-            if evaluation <= 1:
-                return evaluation
-            return evaluation + Board.get_bridge_reward(self.token) - Board.get_bridge_reward(1 if self.token == 2 else 2)
+        if depth == max_depth or self.board.bitboard.get_num_empty_tiles() == 0:
+            evaluation = self.evaluate_leaf(depth)
+            self.transposition_table.store(state_key, remaining_depth, evaluation, EXACT, None)
+            return evaluation
+
+        # Successors come staged: the best move of an earlier visit, the killer moves, then by history and centrality
+        tt_move = entry[3] if entry is not None else None
+        successors = self.move_ordering.generate_moves(self.board, player_token, depth, tt_move, self.get_centrality,
+                                                       stats)
 
-        if depth == 1:
-            custom_player = AI_Minmax_Player(self.token)
-            if custom_player.get_dijkstra_score(self.token) == 0:  # it's a winning move
-                return 3000000
+        # At the frontier the children are evaluated together, in chunks of growing size so that cutoffs still save work
+        leaf_scores: list[float] | None = None
+        if self.batch_leaves and depth + 1 == max_depth:
+            leaf_scores, successors = [], list(successors)
 
+        alpha_original, beta_original = alpha, beta
+        best_move = None
         if isMaximizingPlayer:
             best_value = float("-inf")
-            for successor in successors:
-                Board.make_move(successor.position, player_token)
-                value = self.alpha_beta_pruned_minimax(depth=depth + 1, isMaximizingPlayer=False, alpha=alpha,
-                                                       beta=beta, player_token=new_player_token)
-                Board.remove_move(successor.position)
-                best_value = max(best_value, value)
+            for index, move in enumerate(successors):
+                if leaf_scores is not None and index == len(leaf_scores):
+                    leaf_scores.extend(self.evaluate_frontier(successors[index:2 * index + 4], player_token, depth + 1))
+                self.board.make_move(move, player_token)
+                try:
+                    if leaf_scores is not None:
+                        value = self.get_frontier_value(depth + 1, leaf_scores[index])
+                    else:
+                        value = self.search_successor(depth + 1, False, alpha, beta, new_player_token, max_depth,
+                                                      null_window=self.pvs and index > 0)
+                finally:
+                    self.board.remove_move(move)
+                if best_move is None or value > best_value:
+                    best_value, best_move = value, move
                 alpha = max(alpha, best_value)
                 if beta <= alpha:
+                    stats.add_cutoff(index)
+                    self.move_ordering.add_cutoff(move, depth, remaining_depth)
                     break
-            return best_value
 
         else:
             best_value = float("inf")
-            for successor in successors:
-                Board.make_move(successor.position, player_token)
-                value = self.alpha_beta_pruned_minimax(depth=depth + 1, isMaximizingPlayer=True, alpha=alpha,
-                                                       beta=beta, player_token=new_player_token)
-                Board.remove_move(successor.position)
-                best_value = min(best_value, value)
+            for index, move in enumerate(successors):
+                if leaf_scores is not None and index == len(leaf_scores):
+                    leaf_scores.extend(self.evaluate_frontier(successors[index:2 * index + 4], player_token, depth + 1))
+                self.board.make_move(move, player_token)
+                try:
+                    if leaf_scores is not None:
+                        value = self.get_frontier_value(depth + 1, leaf_scores[index])
+                    else:
+                        value = self.search_successor(depth + 1, True, alpha, beta, new_player_token, max_depth,
+                                                      null_window=self.pvs and index > 0)
+                finally:
+                    self.board.remove_move(move)
+                if best_move is None or value < best_value:
+                    best_value, best_move = value, move
                 beta = min(beta, best_value)
                 if beta <= alpha:
+                    stats.add_cutoff(index)
+                    self.move_ordering.add_cutoff(move, depth, remaining_depth)
                     break
-            return best_value
+        self.transposition_table.store(state_key, remaining_depth, best_value,
+                                       get_bound(best_value, alpha_original, beta_original), best_move)
+        return best_value
+
+    def search_successor(self, depth: int, isMaximizingPlayer: bool, alpha: float, beta: float, player_token: int,
+                         max_depth: int, null_window: bool = False) -> float:
+        """
+        Search the position reached by a move of the parent node with the parent's window
+
+        With null_window the move is first probed with a null window on the parent's bound, and only searched with the
+        whole window when it turns out better than the moves searched before it (principal variation search)
+        """
+        if null_window:
+            if isMaximizingPlayer:  # the parent minimizes, probe whether the move stays at or above beta
+                probe_alpha, probe_beta = math.nextafter(beta, float("-inf")), beta
+            else:  # the parent maximizes, probe whether the move stays at or below alpha
+                probe_alpha, probe_beta = alpha, math.nextafter(alpha, float("inf"))
+            value = self.alpha_beta_pruned_minimax(depth=depth, isMaximizingPlayer=isMaximizingPlayer, alpha=probe_alpha,
+                                                   beta=probe_beta, player_token=player_token, max_depth=max_depth)
+            fails_high = value >= probe_beta
+            if fails_high == isMaximizingPlayer or (probe_alpha, probe_beta) == (alpha, beta):
+                return value
+        return self.alpha_beta_pruned_minimax(depth=depth, isMaximizingPlayer=isMaximizingPlayer, alpha=alpha, beta=beta,
+                                              player_token=player_token, max_depth=max_depth)
+
+    def get_win_value(self, win_token: int, depth: int) -> float:
+        """
+        Get the value of a position won by one of the players, sooner wins score higher
+        """
+        return 3000000 - depth + 1 if win_token == self.token else depth - 1 - 3000000
 
-    def __init__(self, token: int):
+    def evaluate_leaf(self, depth: int) -> float:
+        """
+        Get the heuristic value of a leaf position
+        """
+        self.search_stats.leaf_evaluations += 1
+        start = time.perf_counter()
+        if self.batch_leaves:
+            evaluation = self.evaluate_score(self.token, depth)
+        else:
+            evaluation = self.evaluate_score_two_distance(self.token, depth)
+        self.search_stats.add_time('evaluation', start)
+        if evaluation > 1:
+            start = time.perf_counter()
+            evaluation = evaluation + self.board.get_bridge_reward(self.token) - self.board.get_bridge_reward(1 if self.token == 2 else 2)
+            self.search_stats.add_time('bridge_reward', start)
+        return evaluation
+
+    def evaluate_frontier(self, moves: list[tuple[int, int]], player_token: int, depth: int) -> list[float]:
+        """
+        Get the leaf scores of the positions reached by each move of player
+        """
+        start = time.perf_counter()
+        scores = evaluate_children(self.board, moves, player_token, self.token, depth).tolist()
+        self.search_stats.add_time('evaluation', start)
+        return scores
+
+    def get_frontier_value(self, depth: int, leaf_score: float) -> float:
+        """
+        Get the value of a leaf position whose score was computed by evaluate_children
+        """
+        self.search_stats.add_node(depth)
+        self.search_stats.leaf_evaluations += 1
+        win_token = self.board.get_win_token()
+        if win_token is not None:
+            leaf_score = self.get_win_value(win_token, depth)
+        self.transposition_table.store(self.board.get_search_key(depth), 0, leaf_score, EXACT, None)
+        return leaf_score
+
+    def __init__(self, token: int, batch_leaves: bool = False, num_workers: int = 1, lazy_smp: bool = False,
+                 board: Board | None = None, pvs: bool = False, use_opening_book: bool = True,
+                 pondering: bool = False, ponder_all_replies: bool = False, prune_dead_cells: bool = True,
+                 restrict_to_must_play: bool = True, solver_empty_tiles: int | None = 16,
+                 solve_small_boards: bool = False):
+        """
+        Initialize a minimax player
+
+        With batch_leaves the leaves are scored by evaluate_score instead of the two distance evaluation, so that all
+        children at the frontier can be scored together by evaluate_children. With more than one worker the root moves
+        are searched in parallel by a pool of num_workers processes, or with lazy_smp the whole root is searched by this
+        process while the other workers search it as helpers, sharing a transposition table in shared memory. With pvs
+        every move but the first of a node is probed with a null window before being searched (principal variation
+        search). With use_opening_book the moves of positions in the opening book of the board size are played without
+        searching, see build_opening_book.py. With pondering the game lets the player search on the opponent's time,
+        see ponder. With prune_dead_cells the dead tiles are not searched, see inferior_cells.py, and with
+        restrict_to_must_play only the tiles stopping the virtual wins of the opponent are, see virtual_connections.py.
+        Positions with at most solver_empty_tiles empty tiles, or with solve_small_boards any position of a small
+        board, are solved exactly first, see get_solved_move; None turns the solver off
+        """
         self.max_depth = 3
-        super().__init__(token)
+        super().__init__(token, board)
+        self.batch_leaves = batch_leaves
+        self.num_workers = num_workers
+        self.lazy_smp = lazy_smp
+        self.pvs = pvs
+        self.use_opening_book = use_opening_book
+        self.pondering = pondering
+        self.ponder_all_replies = ponder_all_replies
+        self.ponder_moves: dict[int, tuple[int, int]] = dict()
+        '''Best move found by the last ponder for the position after every reply searched, by Zobrist key'''
+        self.solver_empty_tiles = solver_empty_tiles
+        self.solve_small_boards = solve_small_boards
+        self.solver_max_nodes = 50000
+        '''Positions the solver may search for a move before the heuristic search takes over'''
+        self.solver_time_cap = 0.1
+        '''Seconds the solver may take for a move searched without a time budget'''
+        self.solver_gave_up_empty_tiles: int | None = None
+        '''Empty tiles of the last small board position the solver gave up on above solver_empty_tiles'''
+        self.proof_solver: ProofNumberSolver | None = None
+        self.aspiration_window = 2.0
+        '''Half width of the window around the value of the previous iteration the next one is searched with'''
+        self.executor: ProcessPoolExecutor | None = None
+        self.transposition_table = SharedTranspositionTable() if lazy_smp and num_workers > 1 else TranspositionTable()
+        self.deadline: float | None = None
+        self.search_generation: int | None = None
+        '''Generation of the shared transposition table this player searches for when it is a Lazy SMP helper'''
+        self.move_ordering = MoveOrdering(prune_dead_cells=prune_dead_cells, restrict_to_must_play=restrict_to_must_play)
 
     def get_opponent_token(self):
         return 1 if self.token == 2 else 2
@@ -497,18 +548,247 @@ class AI_Minmax_Graph_Player(AI_Player):
 
         return minimax_results.index(maximum)
 
-    def get_move(self) -> tuple[int, int]:
-        minmax_results: list[float] = list()
+    def get_move(self, time_budget: float | None = None) -> tuple[int, int]:
+        """
+        Get best move using minimax algorithm with alpha beta pruning
+
+        Moves of positions in the opening book, found by the last ponder, or proven winning by the solver are played
+        without searching. Without a time budget search to
+        max_depth, otherwise search to depth 1, 2, 3, ... and return the best move of the deepest search completed
+        within time_budget seconds
+        """
+        self.search_stats = SearchStats()
+        self.move_ordering.new_search()
+        start = time.perf_counter()
+        best_tile = self.get_book_move()
+        if best_tile is None:
+            best_tile = self.ponder_moves.get(self.board.zobrist_key)
+        if best_tile is None or self.board.is_tile_occupied(best_tile):
+            best_tile = self.get_solved_move(time_budget)
+        if best_tile is None:
+            if time_budget is not None:  # what the solver left of the budget
+                time_budget = max(start + time_budget - time.perf_counter(), 0.0)
+            best_tile = self.search_best_tile(time_budget)
+        self.report_search_stats(start)
+        return best_tile
+
+    def ponder(self):
+        """
+        Search the positions after the opponent's replies while the opponent thinks, until cancel_search is called
+
+        get_move answers a reply searched to the end at once, and the transposition table is warm for the others. The
+        reply the last search expected comes first; with ponder_all_replies the other replies follow, most central first
+        """
+        self.search_stats = SearchStats()
+        self.ponder_moves = dict()
+        opponent_token = self.get_opponent_token()
+        replies = sorted(self.board.get_unoccupied_tiles(), key=self.get_centrality)
+        # The last search stored the best reply it found for the position after its move, reached at depth 1
+        entry = self.transposition_table.load(self.board.get_search_key(1))
+        if entry is not None and entry[3] is not None and entry[3] in replies:
+            replies.remove(entry[3])
+            replies.insert(0, entry[3])
+        if not self.ponder_all_replies:
+            replies = replies[:1]
+        for reply in replies:
+            self.board.make_move(reply, opponent_token)
+            try:
+                if self.board.get_win_token() is None:
+                    self.move_ordering.new_search()
+                    self.ponder_moves[self.board.zobrist_key] = self.search_best_tile(None)
+            finally:
+                self.board.remove_move(reply)
+
+    def get_solved_move(self, time_budget: float | None) -> tuple[int, int] | None:
+        """
+        Get a winning move proven by the proof-number solver, or None when it has to be searched
+
+        The solver takes positions with at most solver_empty_tiles empty tiles, or with solve_small_boards any position
+        on a small board, and gives up after solver_max_nodes positions, half the time budget or, without one,
+        solver_time_cap seconds. Once it gave up on a small board above solver_empty_tiles it waits for that threshold,
+        unless a new game starts. A lost position is searched as well, the heuristic search picks the move that makes
+        winning hardest for the opponent
+        """
+        board_size = self.board.board_size
+        num_empty_tiles = self.board.bitboard.get_num_empty_tiles()
+        if self.solver_empty_tiles is None:
+            return None
+        if num_empty_tiles > self.solver_empty_tiles:
+            if not self.solve_small_boards or board_size > SMALL_BOARD_SIZE:
+                return None
+            if self.solver_gave_up_empty_tiles is not None and num_empty_tiles <= self.solver_gave_up_empty_tiles:
+                return None
+        if self.proof_solver is None or self.proof_solver.bitboard.board_size != board_size:
+            self.proof_solver = ProofNumberSolver(board_size)
+        time_limit = time_budget / 2 if time_budget is not None else self.solver_time_cap
+        result = self.proof_solver.solve(self.board.bitboard, self.token, self.solver_max_nodes,
+                                         time.perf_counter() + time_limit, lambda: self.search_cancelled)
+        self.search_stats.solver_nodes += self.proof_solver.num_nodes
+        if result is None and num_empty_tiles > self.solver_empty_tiles:
+            self.solver_gave_up_empty_tiles = num_empty_tiles
+        if result is None or result[0] is False:
+            return None
+        return result[1]
+
+    def get_book_move(self) -> tuple[int, int] | None:
+        """
+        Get the opening book move of the current position, or None when it has to be searched
+        """
+        if not self.use_opening_book:
+            return None
+        opening_book = get_opening_book(self.board.board_size)
+        return opening_book.get_move(self.board) if opening_book is not None else None
+
+    def search_best_tile(self, time_budget: float | None) -> tuple[int, int]:
+        """
+        Search the best move as described in get_move
+        """
+        pruned_tiles = self.move_ordering.get_pruned_tiles(self.board, self.token, self.search_stats)
+        unoccupied_tiles = sorted((tile for tile in self.board.get_unoccupied_tiles()
+                                   if not pruned_tiles >> (tile[0] * self.board.board_size + tile[1]) & 1),
+                                  key=self.get_centrality)
+
+        if time_budget is None:
+            minmax_results: list[float] = list()
+            self.search_root_moves(unoccupied_tiles, self.max_depth, minmax_results)
+            return self.choose_best_tile(unoccupied_tiles, minmax_results)
+
+        best_tile: tuple[int, int] | None = None
+        best_value: float | None = None
+        self.deadline = time.perf_counter() + time_budget
+        try:
+            for max_depth in range(1, len(unoccupied_tiles) + 1):
+                minmax_results = list()
+                if best_value is None:
+                    self.search_root_moves(unoccupied_tiles, max_depth, minmax_results)
+                else:
+                    # Aspiration window: expect the value of the previous iteration, search again if it is outside
+                    root_alpha, root_beta = best_value - self.aspiration_window, best_value + self.aspiration_window
+                    self.search_root_moves(unoccupied_tiles, max_depth, minmax_results, root_alpha, root_beta)
+                    if not root_alpha < max(minmax_results) < root_beta:
+                        minmax_results = list()
+                        self.search_root_moves(unoccupied_tiles, max_depth, minmax_results)
+                best_value = max(minmax_results)
+                best_tile = self.choose_best_tile(unoccupied_tiles, minmax_results)
+                if max(minmax_results) > 3000000 - self.board.num_nodes:  # a forced win was found, searching deeper won't change it
+                    break
+                # Search the best moves of this iteration first in the next one
+                ordering = sorted(range(len(unoccupied_tiles)), key=lambda i: -minmax_results[i])
+                unoccupied_tiles = [unoccupied_tiles[i] for i in ordering]
+        except SearchTimeout:
+            if best_tile is None:  # not even the first iteration finished, use the root moves searched so far
+                if len(minmax_results) == 0:
+                    return unoccupied_tiles[0]
+                best_tile = self.choose_best_tile(unoccupied_tiles[:len(minmax_results)], minmax_results)
+        finally:
+            self.deadline = None
+        return best_tile
+
+    def search_root_moves(self, unoccupied_tiles: list[tuple[int, int]], max_depth: int, minmax_results: list[float],
+                          root_alpha: float = float("-inf"), root_beta: float = float("inf")):
+        """
+        Search every root move to max_depth, appending its value to minmax_results as soon as it is known
+
+        The root moves share one window: a move worse than the best one so far only gets an upper bound, but moves
+        as good as it still get their exact value so that choose_best_tile picks among the same tiles. Values are exact
+        between root_alpha and root_beta, and only bounds outside. A move failing high, at or above root_beta, ends the
+        search of the root moves: the next ones would get a window with alpha above beta, and the bounds stored from it
+        would be wrong, so the caller has to search again with a wider window
+        """
+        if self.num_workers > 1 and not self.lazy_smp:
+            self.search_root_moves_in_pool(unoccupied_tiles, max_depth, minmax_results, root_alpha, root_beta)
+            return
+        if self.num_workers > 1:
+            self.start_helper_searches(unoccupied_tiles, max_depth)
+        try:
+            best_value = float("-inf")
+            for index, tile in enumerate(unoccupied_tiles):
+                alpha = max(root_alpha, math.nextafter(best_value, float("-inf")))
+                self.board.make_move(tile, self.token)
+                try:
+                    value = self.search_successor(1, False, alpha, root_beta, self.get_opponent_token(), max_depth,
+                                                  null_window=self.pvs and index > 0)
+                finally:
+                    self.board.remove_move(tile)
+                minmax_results.append(value)
+                best_value = max(best_value, value)
+                if best_value >= root_beta:
+                    break
+        finally:
+            if self.num_workers > 1:
+                self.transposition_table.next_generation()  # stop the helpers
+
+    def search_root_moves_in_pool(self, unoccupied_tiles: list[tuple[int, int]], max_depth: int,
+                                  minmax_results: list[float], root_alpha: float = float("-inf"),
+                                  root_beta: float = float("inf")):
+        """
+        Search the root moves like search_root_moves, each one in a worker process of the pool
+
+        The root moves are searched at the same time, so they don't share a window beyond root_alpha and root_beta. The
+        results are appended in the order of the root moves, so they merge with the same tie breaking
+        """
+        encoding = self.board.bitboard.encode()
+        futures = [self.get_executor().submit(search_root_move, encoding, tile, self.token, max_depth, self.batch_leaves,
+                                              self.deadline, root_alpha, root_beta, self.pvs,
+                                              self.move_ordering.prune_dead_cells,
+                                              self.move_ordering.restrict_to_must_play)
+                   for tile in unoccupied_tiles]
+        try:
+            for future in futures:
+                if self.search_cancelled:
+                    raise SearchCancelled()
+                value, stats = future.result()
+                minmax_results.append(value)
+                self.search_stats.merge(stats)
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def start_helper_searches(self, unoccupied_tiles: list[tuple[int, int]], max_depth: int):
+        """
+        Start the Lazy SMP helpers, which search the same root until the table moves to the next generation
+
+        Every other helper searches one ply deeper, and each one starts from a different root move, so that they fill
+        the shared transposition table with results this process has not computed yet
+        """
+        encoding = self.board.bitboard.encode()
+        generation = self.transposition_table.get_generation()
+        for helper in range(1, self.num_workers):
+            start = helper % len(unoccupied_tiles)
+            self.get_executor().submit(run_helper_search, self.transposition_table, encoding,
+                                       unoccupied_tiles[start:] + unoccupied_tiles[:start], self.token,
+                                       max_depth + helper % 2, self.batch_leaves, generation, self.deadline, self.pvs,
+                                       self.move_ordering.prune_dead_cells, self.move_ordering.restrict_to_must_play)
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        """
+        Get the pool of worker processes, starting it on first use
+        """
+        if self.executor is None:
+            # Spawned workers don't inherit the pygame display of this process
+            self.executor = ProcessPoolExecutor(self.num_workers, mp_context=multiprocessing.get_context('spawn'))
+        return self.executor
+
+    def shutdown_pool(self):
+        """
+        Stop the worker processes, a new pool is started by the next parallel search
+        """
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
 
-        unoccupied_tiles = sorted(Board.get_unoccupied_tiles(), key=lambda x: abs(x[0] - (Board.board_size - 1)/2) + abs(x[1] - (Board.board_size - 1)/2))
+    def close(self):
+        """
+        Stop the worker processes and remove the shared transposition table of a Lazy SMP player
+        """
+        self.shutdown_pool()
+        if isinstance(self.transposition_table, SharedTranspositionTable):
+            self.transposition_table.close()
 
-        for tile in unoccupied_tiles:
-            Board.make_move(tile, self.token)
-            value = self.alpha_beta_pruned_minimax(depth=1, isMaximizingPlayer=False, alpha=float("-inf"),
-                                                   beta=float("inf"),
-                                                   player_token=self.get_opponent_token(), max_depth=self.max_depth)
-            minmax_results.append(value)
-            Board.remove_move(tile)
+    def choose_best_tile(self, unoccupied_tiles: list[tuple[int, int]], minmax_results: list[float]) -> tuple[int, int]:
+        """
+        Choose randomly among the tiles with the best minimax value
+        """
         index: int = self.find_max_value_move(minmax_results)
         best_tiles = list()
         best_value = minmax_results[index]
@@ -517,3 +797,238 @@ class AI_Minmax_Graph_Player(AI_Player):
                 best_tiles.append(unoccupied_tiles[i])
 
         return best_tiles[random.randint(0, len(best_tiles) - 1)]
+
+
+class MCTSNode(object):
+    """
+    Node of the Monte Carlo search tree of AI_MCTS_Player
+    """
+
+    def __init__(self, move: int | None, player_token: int):
+        """
+        Initialize an unvisited node reached by player_token playing move, a flat tile index (None for the root)
+        """
+        self.move = move
+        self.player_token = player_token
+        '''Token of the player who played move, the wins are counted for this player'''
+        self.children: list[MCTSNode] | None = None
+        '''Nodes of every move from this position, created on the second visit'''
+        self.visits = 0
+        self.wins = 0
+        self.amaf_visits = 0
+        '''Simulations through the parent in which player_token played move at any later turn (all moves as first)'''
+        self.amaf_wins = 0
+
+
+class AI_MCTS_Player(AI_Player):
+
+    def __init__(self, token: int, board: Board | None = None, max_playouts: int | None = 20000,
+                 time_budget: float | None = 5.0, exploration: float = 0.25, rave_equivalence: float = 500):
+        """
+        Initialize a Monte Carlo tree search player
+
+        A move is searched until max_playouts playouts were run or time_budget seconds passed, whichever comes first.
+        Children are selected by UCT on a value blending their own results with their RAVE results, whose weight
+        halves after about rave_equivalence visits of the child
+        """
+        if max_playouts is None and time_budget is None:
+            raise ValueError('The search needs a playout or a time budget')
+        super().__init__(token, board)
+        self.max_playouts = max_playouts
+        self.time_budget = time_budget
+        self.exploration = exploration
+        self.rave_equivalence = rave_equivalence
+
+    def get_opponent_token(self):
+        return 1 if self.token == 2 else 2
+
+    def get_move(self, time_budget: float | None = None) -> tuple[int, int]:
+        """
+        Get the most visited move of a Monte Carlo tree search, within time_budget seconds if given
+        """
+        self.search_stats = SearchStats()
+        start = time.perf_counter()
+        best_tile = self.search_best_tile(time_budget if time_budget is not None else self.time_budget)
+        self.report_search_stats(start)
+        return best_tile
+
+    def search_best_tile(self, time_budget: float | None) -> tuple[int, int]:
+        """
+        Search the best move as described in get_move
+        """
+        board_size = self.board.board_size
+        # Playouts work on the masks of a BitBoard, so that no HexNode is touched
+        self.playout_board = BitBoard(board_size)
+        self.tile_bits = [1 << index for index in range(board_size * board_size)]
+        deadline = time.perf_counter() + time_budget if time_budget is not None else None
+        root = MCTSNode(None, self.get_opponent_token())
+        root_tiles = list(self.board.bitboard.tiles)
+        self.expand(root, root_tiles)
+        num_playouts = 0
+        while True:
+            self.run_simulation(root, list(root_tiles))
+            num_playouts += 1
+            if self.max_playouts is not None and num_playouts >= self.max_playouts:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            if self.search_cancelled:
+                raise SearchCancelled()
+        best_child = max(root.children, key=lambda child: child.visits)
+        return divmod(best_child.move, board_size)
+
+    def run_simulation(self, root: MCTSNode, tiles: list[int]):
+        """
+        Select a path down the tree from the root position, whose masks are tiles, expand its last node, finish the
+        game with a random playout and update the statistics of the path
+        """
+        stats = self.search_stats
+        tile_bits = self.tile_bits
+        node = root
+        path = [root]
+        stats.add_node(0)
+        while node.children is not None and len(node.children) > 0:
+            node = self.select_child(node)
+            tiles[node.player_token] |= tile_bits[node.move]
+            path.append(node)
+            stats.add_node(len(path) - 1)
+        # Leaves get children on their second visit, most leaves are never visited again
+        if node.children is None and node.visits > 0:
+            self.expand(node, tiles)
+            if len(node.children) > 0:
+                node = self.select_child(node)
+                tiles[node.player_token] |= tile_bits[node.move]
+                path.append(node)
+                stats.add_node(len(path) - 1)
+
+        start = time.perf_counter()
+        winner = self.run_playout(tiles, 1 if node.player_token == 2 else 2)
+        stats.add_time('evaluation', start)
+        stats.leaf_evaluations += 1
+
+        for node in path:
+            node.visits += 1
+            node.wins += node.player_token == winner
+            if node.children is None:
+                continue
+            # Moves of the player to move here that this player played at any later turn of the simulation
+            for child in node.children:
+                if tiles[child.player_token] >> child.move & 1:
+                    child.amaf_visits += 1
+                    child.amaf_wins += child.player_token == winner
+
+    def expand(self, node: MCTSNode, tiles: list[int]):
+        """
+        Create the children of a node for every empty tile of its position, whose masks are tiles
+        """
+        occupied = tiles[PLAYER_1_TOKEN] | tiles[PLAYER_2_TOKEN]
+        mover = 1 if node.player_token == 2 else 2
+        node.children = [MCTSNode(index, mover) for index, bit in enumerate(self.tile_bits) if not occupied & bit]
+
+    def select_child(self, node: MCTSNode) -> MCTSNode:
+        """
+        Get the child with the highest UCT value, blending its results with its RAVE results
+        """
+        log_visits = math.log(node.visits + 1)
+        exploration, rave_equivalence = self.exploration, self.rave_equivalence
+        unvisited_exploration = exploration * math.sqrt(log_visits)
+        sqrt = math.sqrt
+        best_child, best_value = None, float('-inf')
+        for child in node.children:
+            visits = child.visits
+            amaf_win_rate = child.amaf_wins / child.amaf_visits if child.amaf_visits > 0 else 0.5
+            if visits == 0:  # only the RAVE results are known, they get the whole weight
+                value = amaf_win_rate + unvisited_exploration
+            else:
+                beta = sqrt(rave_equivalence / (3 * visits + rave_equivalence))
+                value = beta * amaf_win_rate + (1 - beta) * child.wins / visits + \
+                    exploration * sqrt(log_visits / (visits + 1))
+            if value > best_value:
+                best_child, best_value = child, value
+        return best_child
+
+    def run_playout(self, tiles: list[int], player_token: int) -> int:
+        """
+        Fill the empty tiles at random, player_token first, and get the winner; a full board always has one winner
+
+        The masks of the full board are left in tiles
+        """
+        occupied = tiles[PLAYER_1_TOKEN] | tiles[PLAYER_2_TOKEN]
+        tile_bits = self.tile_bits
+        empty_tiles = [bit for bit in tile_bits if not occupied & bit]
+        random.shuffle(empty_tiles)
+        # The bits are distinct, so their sum is their union
+        tiles[player_token] |= sum(empty_tiles[0::2])
+        tiles[1 if player_token == 2 else 2] |= sum(empty_tiles[1::2])
+        self.playout_board.tiles = tiles
+        return PLAYER_1_TOKEN if self.playout_board.check_player_win(PLAYER_1_TOKEN) else PLAYER_2_TOKEN
+
+
+worker_boards: dict[int, Board] = dict()
+'''Board of every size used by a worker process'''
+worker_players: dict[tuple[int, bool, bool, bool, bool], AI_Minmax_Graph_Player] = dict()
+'''Players of a worker process, kept between tasks so that their transposition tables are reused'''
+
+
+def get_worker_board(encoding: tuple[int, int, int]) -> Board:
+    """
+    Get the board of a worker process set up with the encoded position
+
+    The position is only rebuilt when it differs from the position of the last task
+    """
+    if encoding[0] not in worker_boards:
+        worker_boards[encoding[0]] = Board(encoding[0])
+    board = worker_boards[encoding[0]]
+    if board.bitboard.encode() != encoding:
+        board.load_position(encoding)
+    return board
+
+
+def search_root_move(encoding: tuple[int, int, int], tile: tuple[int, int], player_token: int, max_depth: int,
+                     batch_leaves: bool, deadline: float | None, alpha: float = float("-inf"),
+                     beta: float = float("inf"), pvs: bool = False, prune_dead_cells: bool = True,
+                     restrict_to_must_play: bool = True) -> tuple[float, SearchStats]:
+    """
+    Search one root move in a worker process of AI_Minmax_Graph_Player.search_root_moves_in_pool, return its value and
+    the statistics of its search
+
+    deadline is a time.perf_counter value, which is system wide
+    """
+    board = get_worker_board(encoding)
+    player_key = (player_token, batch_leaves, pvs, prune_dead_cells, restrict_to_must_play)
+    if player_key not in worker_players:
+        worker_players[player_key] = AI_Minmax_Graph_Player(player_token, batch_leaves, pvs=pvs,
+                                                            prune_dead_cells=prune_dead_cells,
+                                                            restrict_to_must_play=restrict_to_must_play)
+    player = worker_players[player_key]
+    player.board = board
+    player.deadline = deadline
+    player.search_stats = SearchStats()
+    board.make_move(tile, player_token)
+    try:
+        value = player.alpha_beta_pruned_minimax(depth=1, isMaximizingPlayer=False, alpha=alpha, beta=beta,
+                                                 player_token=player.get_opponent_token(), max_depth=max_depth)
+        return value, player.search_stats
+    finally:
+        board.remove_move(tile)
+        player.deadline = None
+
+
+def run_helper_search(transposition_table: SharedTranspositionTable, encoding: tuple[int, int, int],
+                      unoccupied_tiles: list[tuple[int, int]], player_token: int, max_depth: int, batch_leaves: bool,
+                      generation: int, deadline: float | None, pvs: bool = False, prune_dead_cells: bool = True,
+                      restrict_to_must_play: bool = True):
+    """
+    Search the root as a Lazy SMP helper in a worker process of AI_Minmax_Graph_Player.start_helper_searches
+
+    The results are only shared through the transposition table, the search stops when the table leaves generation
+    """
+    player = AI_Minmax_Graph_Player(player_token, batch_leaves, board=get_worker_board(encoding), pvs=pvs,
+                                    prune_dead_cells=prune_dead_cells, restrict_to_must_play=restrict_to_must_play)
+    player.transposition_table = transposition_table
+    player.search_generation = generation
+    player.deadline = deadline
+    try:
+        player.search_root_moves(unoccupied_tiles, max_depth, list())
+    except SearchTimeout:
+        pass
@@ -0,0 +1,172 @@
+import time
+from typing import Callable
+from graph import PLAYER_1_TOKEN
+from bitboard import BitBoard
+from virtual_connections import get_must_play, get_neighbour_count_masks
+
+
+INFINITY = 10 ** 9
+'''Proof or disproof number of a position that can't be proven, respectively disproven'''
+SMALL_BOARD_SIZE = 5
+'''Boards up to this size are small enough for the players to try solving from any position, see solve_small_boards'''
+
+
+class SolverInterrupted(Exception):
+    """
+    Raised when a solve runs out of nodes or time, or is stopped
+    """
+
+
+class ProofNumberSolver(object):
+    """
+    Depth-first proof-number search (DFPN) solving Hex positions exactly
+
+    Positions are the masks of a BitBoard and the player to move. For every position the table keeps its proof number,
+    the least number of positions still to prove for the player to move to win, and its disproof number, the least
+    number to prove that it loses; Hex has no draw, so one of them eventually reaches 0
+    """
+
+    def __init__(self, board_size: int, max_table_size: int = 1000000):
+        """
+        Initialize a solver with an empty table for a board size; the table is cleared when it exceeds max_table_size
+        """
+        self.bitboard = BitBoard(board_size)
+        self.max_table_size = max_table_size
+        self.table: dict[tuple[int, int, int], tuple[int, int]] = dict()
+        '''Proof and disproof numbers by (player 1 tiles, player 2 tiles, player to move), kept between solves'''
+        self.moves: dict[tuple[int, int, int], list[int]] = dict()
+        '''Moves of the positions searched, DFPN enters most positions several times'''
+        self.num_nodes = 0
+        self.max_nodes: int | None = None
+        self.deadline: float | None = None
+        self.should_stop: Callable[[], bool] | None = None
+
+    def solve(self, bitboard: BitBoard, player_token: int, max_nodes: int | None = None,
+              deadline: float | None = None, should_stop: Callable[[], bool] | None = None
+              ) -> tuple[bool, tuple[int, int] | None] | None:
+        """
+        Solve the position for the player to move: (True, a winning move) when it wins, (False, None) when it loses
+
+        None when the position was not solved within max_nodes nodes or before deadline, a time.perf_counter value, or
+        when should_stop returned True
+        """
+        if len(self.table) > self.max_table_size:
+            self.table.clear()
+            self.moves.clear()
+        self.bitboard.tiles = list(bitboard.tiles)
+        self.num_nodes = 0
+        self.max_nodes, self.deadline, self.should_stop = max_nodes, deadline, should_stop
+        try:
+            proof, _ = self.search(player_token, INFINITY, INFINITY)
+        except SolverInterrupted:
+            return None
+        if proof != 0:
+            return False, None
+        return True, self.get_winning_move(player_token)
+
+    def get_winning_move(self, player_token: int) -> tuple[int, int]:
+        """
+        Get a move of the proven player to move whose position is disproven for the opponent
+        """
+        winning_moves = self.get_winning_moves(player_token)
+        if winning_moves != 0:
+            move = winning_moves & -winning_moves
+        else:
+            opponent_token = 1 if player_token == 2 else 2
+            move = next(move for move in self.get_moves(player_token)
+                        if self.table.get(self.get_child_key(player_token, move, opponent_token), (1, 1))[1] == 0)
+        return divmod(move.bit_length() - 1, self.bitboard.board_size)
+
+    def get_child_key(self, player_token: int, move: int, opponent_token: int) -> tuple[int, int, int]:
+        """
+        Get the table key of the position after player_token plays the tile of the move mask
+        """
+        tiles = self.bitboard.tiles
+        if player_token == PLAYER_1_TOKEN:
+            return tiles[1] | move, tiles[2], opponent_token
+        return tiles[1], tiles[2] | move, opponent_token
+
+    def get_winning_moves(self, player_token: int) -> int:
+        """
+        Get the mask of the empty tiles connecting the borders of the player at once
+
+        Such a tile touches, or lies on, both borders or the tokens connected to them
+        """
+        bitboard = self.bitboard
+        geometry = bitboard.geometry
+        own = bitboard.tiles[player_token]
+        if player_token == PLAYER_1_TOKEN:
+            start_line, end_line = geometry.left_column, geometry.right_column
+        else:
+            start_line, end_line = geometry.top_row, geometry.bottom_row
+        start_touched, _ = get_neighbour_count_masks(bitboard, bitboard.get_connected_tiles(start_line, own))
+        end_touched, _ = get_neighbour_count_masks(bitboard, bitboard.get_connected_tiles(end_line, own))
+        return (start_touched | start_line) & (end_touched | end_line) & bitboard.get_empty_mask()
+
+    def get_moves(self, player_token: int) -> list[int]:
+        """
+        Get the moves of the player to move as one bit masks, restricted to its must-play region if it has one
+        """
+        moves = get_must_play(self.bitboard, player_token)
+        if moves is None:
+            moves = self.bitboard.get_empty_mask()
+        result = list()
+        while moves != 0:
+            move = moves & -moves
+            moves ^= move
+            result.append(move)
+        return result
+
+    def search(self, player_token: int, proof_threshold: int, disproof_threshold: int) -> tuple[int, int]:
+        """
+        Search the position until its proof number reaches proof_threshold or its disproof number reaches
+        disproof_threshold, return both numbers
+
+        The proof number of a position is the least disproof number of its children, its disproof number the sum of
+        their proof numbers; the child with the least disproof number is searched, with the thresholds that make the
+        position reach one of its own as soon as another child would be chosen
+        """
+        self.num_nodes += 1
+        if self.num_nodes & 1023 == 0:
+            if self.max_nodes is not None and self.num_nodes > self.max_nodes:
+                raise SolverInterrupted()
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                raise SolverInterrupted()
+            if self.should_stop is not None and self.should_stop():
+                raise SolverInterrupted()
+        tiles = self.bitboard.tiles
+        key = (tiles[1], tiles[2], player_token)
+        if key not in self.moves and self.get_winning_moves(player_token) != 0:
+            self.table[key] = 0, INFINITY
+            return 0, INFINITY
+
+        opponent_token = 1 if player_token == 2 else 2
+        moves = self.moves.get(key)
+        if moves is None:
+            moves = self.moves[key] = self.get_moves(player_token)
+        child_keys = [self.get_child_key(player_token, move, opponent_token) for move in moves]
+        table = self.table
+        while True:
+            proof, disproof = INFINITY, 0
+            best_index, best_disproof, second_disproof = 0, INFINITY, INFINITY
+            for index, child_key in enumerate(child_keys):
+                child_proof, child_disproof = table.get(child_key, (1, 1))
+                disproof = min(disproof + child_proof, INFINITY)
+                if child_disproof < best_disproof:
+                    best_index, best_disproof, second_disproof = index, child_disproof, best_disproof
+                elif child_disproof < second_disproof:
+                    second_disproof = child_disproof
+            proof = best_disproof
+            if proof >= proof_threshold or disproof >= disproof_threshold:
+                table[key] = proof, disproof
+                return proof, disproof
+
+            child_proof = table.get(child_keys[best_index], (1, 1))[0]
+            child_proof_threshold = min(disproof_threshold - disproof + child_proof, INFINITY)
+            child_disproof_threshold = min(proof_threshold, second_disproof + 1)
+            move = moves[best_index]
+            tiles[player_token] |= move
+            try:
+                self.search(opponent_token, child_proof_threshold, child_disproof_threshold)
+            finally:
+                tiles[player_token] ^= move
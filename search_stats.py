@@ -0,0 +1,139 @@
+import json, time
+
+
+class SearchStats(object):
+    """
+    Counters and timings of the search for one move
+
+    Depths are counted in plies from the position the move is chosen in
+    """
+
+    def __init__(self):
+        """
+        Initialize empty statistics
+        """
+        self.nodes_per_depth: list[int] = list()
+        self.leaf_evaluations = 0
+        self.beta_cutoffs = 0
+        self.cutoffs_per_move_index: list[int] = list()
+        '''Number of cutoffs caused by the first, second, ... move searched at a node'''
+        self.tt_probes = 0
+        self.tt_hits = 0
+        '''Probes that found an entry for the position'''
+        self.tt_cutoffs = 0
+        '''Probes whose entry decided the node without searching it'''
+        self.dead_cells = 0
+        '''Empty tiles left out of the moves of the nodes as dead'''
+        self.must_play_pruned = 0
+        '''Empty tiles left out of the moves of the nodes for being out of the must-play region'''
+        self.solver_nodes = 0
+        '''Positions searched by the proof-number solver'''
+        self.phase_times: dict[str, float] = {'move_generation': 0.0, 'evaluation': 0.0, 'bridge_reward': 0.0}
+        '''Seconds spent in every phase of the search'''
+        self.total_time = 0.0
+
+    def add_node(self, depth: int):
+        """
+        Count a node visited at given depth
+        """
+        while len(self.nodes_per_depth) <= depth:
+            self.nodes_per_depth.append(0)
+        self.nodes_per_depth[depth] += 1
+
+    def add_cutoff(self, move_index: int):
+        """
+        Count a beta cutoff caused by the move at given index in the list of moves of the node
+        """
+        self.beta_cutoffs += 1
+        while len(self.cutoffs_per_move_index) <= move_index:
+            self.cutoffs_per_move_index.append(0)
+        self.cutoffs_per_move_index[move_index] += 1
+
+    def add_time(self, phase: str, start: float):
+        """
+        Add the time since start, a time.perf_counter value, to a phase
+        """
+        self.phase_times[phase] += time.perf_counter() - start
+
+    def get_num_nodes(self) -> int:
+        """
+        Get the number of nodes visited at all depths
+        """
+        return sum(self.nodes_per_depth)
+
+    def get_first_move_cutoff_rate(self) -> float:
+        """
+        Get the fraction of cutoffs caused by the first move searched, 1 for a perfect move ordering
+        """
+        if self.beta_cutoffs == 0:
+            return 0.0
+        return self.cutoffs_per_move_index[0] / self.beta_cutoffs
+
+    def merge(self, other: 'SearchStats'):
+        """
+        Add the statistics of another search, such as a root move searched by a worker process
+        """
+        for depth, num_nodes in enumerate(other.nodes_per_depth):
+            while len(self.nodes_per_depth) <= depth:
+                self.nodes_per_depth.append(0)
+            self.nodes_per_depth[depth] += num_nodes
+        for move_index, num_cutoffs in enumerate(other.cutoffs_per_move_index):
+            while len(self.cutoffs_per_move_index) <= move_index:
+                self.cutoffs_per_move_index.append(0)
+            self.cutoffs_per_move_index[move_index] += num_cutoffs
+        self.leaf_evaluations += other.leaf_evaluations
+        self.beta_cutoffs += other.beta_cutoffs
+        self.tt_probes += other.tt_probes
+        self.tt_hits += other.tt_hits
+        self.tt_cutoffs += other.tt_cutoffs
+        self.dead_cells += other.dead_cells
+        self.must_play_pruned += other.must_play_pruned
+        self.solver_nodes += other.solver_nodes
+        for phase, seconds in other.phase_times.items():
+            self.phase_times[phase] = self.phase_times.get(phase, 0.0) + seconds
+
+    def to_dict(self) -> dict:
+        """
+        Get the statistics as a JSON serializable dictionary
+        """
+        return {
+            'nodes': self.get_num_nodes(),
+            'nodes_per_depth': self.nodes_per_depth,
+            'leaf_evaluations': self.leaf_evaluations,
+            'beta_cutoffs': self.beta_cutoffs,
+            'first_move_cutoff_rate': self.get_first_move_cutoff_rate(),
+            'cutoffs_per_move_index': self.cutoffs_per_move_index,
+            'tt_probes': self.tt_probes,
+            'tt_hits': self.tt_hits,
+            'tt_cutoffs': self.tt_cutoffs,
+            'dead_cells': self.dead_cells,
+            'must_play_pruned': self.must_play_pruned,
+            'solver_nodes': self.solver_nodes,
+            'phase_times': self.phase_times,
+            'total_time': self.total_time,
+        }
+
+
+class SearchStatsLog(object):
+    """
+    Callback for the players' stats_callback appending every record to a JSON lines file
+    """
+
+    def __init__(self, path: str):
+        """
+        Open the log file for appending
+        """
+        self.log_file = open(path, 'a')
+
+    def __call__(self, player_token: int, stats: SearchStats):
+        """
+        Write the statistics of a move chosen by the player
+        """
+        self.log_file.write(json.dumps({'player': player_token, **stats.to_dict()}) + '\n')
+        self.log_file.flush()
+
+    def close(self):
+        """
+        Close the log file
+        """
+        self.log_file.close()
@@ -0,0 +1,239 @@
+import heapq
+from collections import deque
+from board import *
+
+
+def get_distance_buffers(board: Board) -> tuple[list[float], list[float], list[bool], list[bool]]:
+    """
+    Get the preallocated distance and visited arrays of the board, plus the values they are reset to
+
+    They are kept on the board rather than per board size, so that boards searched in different threads never share
+    them
+    """
+    if board.distance_buffers is None:
+        num_nodes = board.num_nodes + 4
+        board.distance_buffers = [float('inf')] * num_nodes, [float('inf')] * num_nodes, \
+            [False] * num_nodes, [False] * num_nodes
+    return board.distance_buffers
+
+
+def get_two_distance_buffers(board: Board) -> tuple[list[int], ...]:
+    """
+    Get the preallocated arrays of get_two_distance for the board, the last two hold the -1 and 0 they are reset to
+    """
+    if board.two_distance_buffers is None:
+        size = board.num_nodes + 5
+        board.two_distance_buffers = tuple([0] * size for _ in range(11)) + ([-1] * size, [0] * size)
+    return board.two_distance_buffers
+
+
+def get_border_distance(board: Board, player_token: int) -> int:
+    """
+    Get the number of tiles player still needs to connect its borders, as estimated by AI_Minmax_Player
+
+    The tiles are settled in order of distance and, for equal distances, column by column; the search stops as soon as
+    a tile in the last column (player 1) or last row (player 2) is reached from a settled tile
+    """
+    board_size = board.board_size
+    num_tiles = board_size * board_size
+    tiles = board.board.ravel().tolist()
+    neighbours = board.geometry.tile_neighbours
+    ranks, tiles_by_rank = board.geometry.column_major_ranks, board.geometry.tiles_by_column_rank
+    distances, initial_distances, settled, initial_settled = get_distance_buffers(board)
+    distances[:] = initial_distances
+    settled[:] = initial_settled
+    opponent_token = 1 if player_token == 2 else 2
+
+    if player_token == PLAYER_1_TOKEN:
+        sources = [i * board_size for i in range(board_size)]
+        sinks = range(board_size - 1, num_tiles, board_size)
+    else:
+        sources = list(range(board_size))
+        sinks = range(num_tiles - board_size, num_tiles)
+    is_sink = [False] * num_tiles
+    for tile in sinks:
+        is_sink[tile] = True
+
+    # Heap keys pack the distance and the column major rank so that ties are settled column by column
+    heap: list[int] = list()
+    for tile in sources:
+        if tiles[tile] != opponent_token:
+            distances[tile] = 0 if tiles[tile] == player_token else 1
+            if is_sink[tile]:
+                return distances[tile]
+            heap.append(distances[tile] * num_tiles + ranks[tile])
+    heapq.heapify(heap)
+
+    while len(heap) > 0:
+        key = heapq.heappop(heap)
+        distance, tile = divmod(key, num_tiles)
+        tile = tiles_by_rank[tile]
+        if settled[tile] or distance != distances[tile]:
+            continue
+        settled[tile] = True
+        for neighbour in neighbours[tile]:
+            if settled[neighbour] or tiles[neighbour] == opponent_token:
+                continue
+            new_distance = distance + (0 if tiles[neighbour] == player_token else 1)
+            if new_distance < distances[neighbour]:
+                distances[neighbour] = new_distance
+                heapq.heappush(heap, new_distance * num_tiles + ranks[neighbour])
+            if is_sink[neighbour]:
+                return distances[neighbour]
+    return 10000
+
+
+def get_graph_distance(board: Board, source_value: int, player_token: int) -> int | float:
+    """
+    Get the shortest distance in the board graph from the source node to the RIGHT (player 1) or DOWN (player 2) node
+
+    Edge costs are 0 or 1, so a 0-1 BFS over a deque settles nodes in order of distance
+    """
+    board_size = board.board_size
+    graph = board.graph
+    edge_slots, edge_targets, edge_costs = graph.edge_slots, graph.edge_targets, graph.edge_costs
+    statuses = [node.status for node in graph.hex_nodes]
+    distances, initial_distances, settled, initial_settled = get_distance_buffers(board)
+    distances[:] = initial_distances
+    settled[:] = initial_settled
+    target_value = board.num_nodes + (RIGHT if player_token == PLAYER_1_TOKEN else DOWN)
+
+    distances[source_value] = 0
+    queue = deque([source_value])
+    while len(queue) > 0:
+        current = queue.popleft()
+        if settled[current]:
+            continue
+        if current == target_value:
+            break
+        settled[current] = True
+        distance = distances[current]
+        for slot in edge_slots[current]:
+            neighbour = edge_targets[slot]
+            status = statuses[neighbour]
+            if status != UNOCCUPIED and status != player_token:
+                continue
+            edge_cost = edge_costs[slot]
+            new_distance = distance + edge_cost
+            if new_distance < distances[neighbour]:
+                distances[neighbour] = new_distance
+                if edge_cost == 0:
+                    queue.appendleft(neighbour)
+                else:
+                    queue.append(neighbour)
+    return distances[target_value]
+
+
+def get_two_distance(board: Board, player_token: int) -> int | None:
+    """
+    Get the two distance from the LEFT to the RIGHT node (player 1) or from the UP to the DOWN node (player 2), None
+    when fewer than two neighbours of the target node have one
+
+    The neighbourhood of a tile is the empty tiles next to it or to a chain of the player it touches. The tiles in the
+    neighbourhood of the source node's chain get distance 1, any other empty tile gets one as soon as it is in the
+    neighbourhoods of two tiles that have one, from the smaller of their distances. Tiles are taken in the order they
+    get their distance, the ones that get it from the same tile by increasing node value.
+
+    Chains are labelled once and the neighbourhood of a chain is only walked for the first two tiles next to it, after
+    that every tile in it has its distance; a call is thus linear in the size of the board graph.
+    """
+    num_nodes = board.num_nodes
+    adjacent = board.geometry.node_neighbours
+    statuses = [node.status for node in board.graph.hex_nodes]
+    group_of, members, group_starts, group_ends, group_walks, group_marks, marks, num_entries, min_entries, queue, \
+        walk, initial_negative, initial_zero = get_two_distance_buffers(board)
+    group_of[:] = initial_negative
+    group_marks[:] = initial_negative
+    marks[:] = initial_negative
+    num_entries[:] = initial_zero
+    if player_token == PLAYER_1_TOKEN:
+        source_value, target_value = num_nodes + LEFT, num_nodes + RIGHT
+    else:
+        source_value, target_value = num_nodes + UP, num_nodes + DOWN
+
+    # The chain g of the player, border nodes included, is members[group_starts[g]:group_ends[g]]
+    num_groups = 0
+    num_members = 0
+    for node_value in range(num_nodes + 4):
+        if statuses[node_value] != player_token or group_of[node_value] >= 0:
+            continue
+        group_of[node_value] = num_groups
+        group_starts[num_groups] = index = num_members
+        members[num_members] = node_value
+        num_members += 1
+        while index < num_members:
+            for neighbour in adjacent[members[index]]:
+                if statuses[neighbour] == player_token and group_of[neighbour] < 0:
+                    group_of[neighbour] = num_groups
+                    members[num_members] = neighbour
+                    num_members += 1
+            index += 1
+        group_ends[num_groups] = num_members
+        group_walks[num_groups] = 0
+        num_groups += 1
+
+    source_group = group_of[source_value]
+    group_walks[source_group] = 2
+    tail = 0
+    for index in range(group_starts[source_group], group_ends[source_group]):
+        for tile in adjacent[members[index]]:
+            if statuses[tile] == UNOCCUPIED and num_entries[tile] == 0:
+                num_entries[tile] = 2
+                min_entries[tile] = 0
+                queue[tail] = tile
+                tail += 1
+    queue[:tail] = sorted(queue[:tail])
+
+    head = 0
+    while head < tail:
+        current = queue[head]
+        head += 1
+        entry = min_entries[current] + 1
+        # Collect the tile and the chains whose neighbourhood still has tiles without a distance
+        walk[0] = current
+        walk_end = 1
+        for neighbour in adjacent[current]:
+            if statuses[neighbour] != player_token:
+                continue
+            group = group_of[neighbour]
+            if group_walks[group] < 2 and group_marks[group] != current:
+                group_marks[group] = current
+                group_walks[group] += 1
+                for index in range(group_starts[group], group_ends[group]):
+                    walk[walk_end] = members[index]
+                    walk_end += 1
+        first_queued = tail
+        for index in range(walk_end):
+            for tile in adjacent[walk[index]]:
+                if statuses[tile] != UNOCCUPIED or marks[tile] == current or num_entries[tile] == 2:
+                    continue
+                marks[tile] = current
+                if num_entries[tile] == 0:
+                    num_entries[tile] = 1
+                    min_entries[tile] = entry
+                else:
+                    num_entries[tile] = 2
+                    if entry < min_entries[tile]:
+                        min_entries[tile] = entry
+                    queue[tail] = tile
+                    tail += 1
+        if tail - first_queued > 1:
+            queue[first_queued:tail] = sorted(queue[first_queued:tail])
+
+    num_neighbours = 0
+    first, second = None, None
+    for neighbour in adjacent[target_value]:
+        status = statuses[neighbour]
+        if status == player_token:
+            num_neighbours += 1
+        elif status == UNOCCUPIED:
+            num_neighbours += 1
+            if num_entries[neighbour] == 2:
+                value = min_entries[neighbour] + 1
+                if first is None or value < first:
+                    first, second = value, first
+                elif second is None or value < second:
+                    second = value
+    if num_neighbours < 2 or second is None:
+        return None
+    return second + 1
@@ -0,0 +1,175 @@
+import numpy, struct, weakref
+from multiprocessing import shared_memory
+
+
+# Type of bound stored for an evaluation
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+
+class TranspositionTable(object):
+    """
+    Cache of already searched positions keyed by their Zobrist hash
+
+    Each entry is a tuple (value, bound, depth, move) where depth is the remaining search depth below the position
+    """
+
+    def __init__(self, max_entries: int = 1 << 19):
+        """
+        Initialize an empty transposition table
+        """
+        self.max_entries = max_entries
+        self.entries: dict[int, tuple[float, int, int, tuple[int, int] | None]] = dict()
+
+    def store(self, key: int, depth: int, value: float, bound: int, move: tuple[int, int] | None):
+        """
+        Store the result of a search, keeping the deeper result if the position was already stored
+        """
+        entry = self.entries.get(key)
+        if entry is not None and entry[2] > depth:
+            return
+        if entry is None and len(self.entries) >= self.max_entries:
+            self.entries.clear()
+        self.entries[key] = value, bound, depth, move
+
+    def load(self, key: int) -> tuple[float, int, int, tuple[int, int] | None] | None:
+        """
+        Get the stored entry for a position or None if it has not been searched
+        """
+        return self.entries.get(key)
+
+    def clear(self):
+        """
+        Remove all entries
+        """
+        self.entries.clear()
+
+
+class SharedTranspositionTable(object):
+    """
+    Fixed size transposition table in shared memory, usable by several processes at once without locks
+
+    Every slot holds three words: the key xor the two data words, the value as the bits of a float, and the bound,
+    depth and move packed together with a bit marking the slot as used. A slot whose words were written concurrently by
+    two processes fails the xor check on load and is treated as missing. The table pickles by name, so passing it to a
+    worker process attaches to the same memory
+    """
+
+    def __init__(self, num_slots: int = 1 << 19, name: str | None = None):
+        """
+        Create a table with num_slots slots, or attach to the existing table with the given name
+        """
+        self.num_slots = num_slots
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=(num_slots + 1) * 3 * 8)
+            self.memory.buf[:] = bytes(len(self.memory.buf))
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.slots = numpy.ndarray((num_slots + 1, 3), dtype=numpy.uint64, buffer=self.memory.buf)
+        '''The last row is not a slot, its first word counts the searches run with the table (see next_generation)'''
+        self.finalizer = weakref.finalize(self, SharedTranspositionTable.release, self.memory, name is None)
+        '''Releases the shared memory once, on close or when the table is collected'''
+
+    @staticmethod
+    def release(memory: shared_memory.SharedMemory, unlink: bool):
+        """
+        Detach from the shared memory, removing it if this process created it
+        """
+        memory.close()
+        if unlink:
+            memory.unlink()
+
+    def close(self):
+        """
+        Release the shared memory now instead of when the table is collected, the table can't be used afterwards
+        """
+        del self.slots  # the memory can't be closed while an array still uses its buffer
+        self.finalizer()
+
+    def __reduce__(self):
+        return attach_shared_table, (self.memory.name, self.num_slots)
+
+    def store(self, key: int, depth: int, value: float, bound: int, move: tuple[int, int] | None):
+        """
+        Store the result of a search, keeping the deeper result if the position was already stored
+        """
+        entry = self.load(key)
+        if entry is not None and entry[2] > depth:
+            return
+        value_bits = struct.unpack('<Q', struct.pack('<d', value))[0]
+        info = 1 | bound << 1 | depth << 3 | (0 if move is None else (move[0] << 8 | move[1]) + 1) << 17
+        self.slots[key % self.num_slots] = key ^ value_bits ^ info, value_bits, info
+
+    def load(self, key: int) -> tuple[float, int, int, tuple[int, int] | None] | None:
+        """
+        Get the stored entry for a position or None if it has not been searched
+        """
+        check, value_bits, info = self.slots[key % self.num_slots].tolist()
+        if check ^ value_bits ^ info != key or info == 0:
+            return None
+        move = (info >> 17) - 1
+        return struct.unpack('<d', struct.pack('<Q', value_bits))[0], info >> 1 & 3, info >> 3 & 0x3fff, \
+            None if move < 0 else (move >> 8, move & 0xff)
+
+    def clear(self):
+        """
+        Remove all entries
+        """
+        self.slots[:self.num_slots] = 0
+
+    def get_generation(self) -> int:
+        """
+        Get the number of searches finished with this table, a search started in an older generation should stop
+        """
+        return int(self.slots[self.num_slots, 0])
+
+    def next_generation(self):
+        """
+        Signal the end of the current search to all processes using the table
+        """
+        self.slots[self.num_slots, 0] += numpy.uint64(1)
+
+
+attached_tables: dict[str, SharedTranspositionTable] = dict()
+'''Shared tables attached by this process, so that a table received several times is only attached once; the tables
+created by this process are left out, so that their memory is removed as soon as their owner closes or drops them'''
+
+
+def attach_shared_table(name: str, num_slots: int) -> SharedTranspositionTable:
+    """
+    Get the shared table with the given name, attaching to it on first use
+    """
+    if name not in attached_tables:
+        attached_tables[name] = SharedTranspositionTable(num_slots, name)
+    return attached_tables[name]
+
+
+def get_bound(value: float, alpha: float, beta: float) -> int:
+    """
+    Get the type of bound a fail-soft search result represents for the window it was searched with
+    """
+    if value <= alpha:
+        return UPPER_BOUND
+    if value >= beta:
+        return LOWER_BOUND
+    return EXACT
+
+
+def get_cutoff_value(entry: tuple[float, int, int, tuple[int, int] | None] | None, depth: int,
+                     alpha: float, beta: float) -> float | None:
+    """
+    Get the stored value if it is deep enough and decides the search for the given window, otherwise None
+    """
+    if entry is None:
+        return None
+    value, bound, entry_depth, _ = entry
+    if entry_depth < depth:
+        return None
+    if bound == EXACT:
+        return value
+    if bound == LOWER_BOUND and value >= beta:
+        return value
+    if bound == UPPER_BOUND and value <= alpha:
+        return value
+    return None
@@ -0,0 +1,183 @@
+from graph import PLAYER_1_TOKEN
+from bitboard import BitBoard, shift_mask
+
+
+MAX_ROUNDS = 3
+'''Number of times groups joined by virtual connections are joined again, as bigger groups connect further'''
+
+
+class VirtualGroup(object):
+    """
+    Tokens of a player, possibly with its borders, that are virtually connected through the empty tiles of a carrier
+    """
+
+    def __init__(self, tiles: int, borders: int, lines: int, carrier: int = 0):
+        """
+        Initialize a group from the mask of its tokens, the borders it holds as bits (1 the first one, 2 the second
+        one), the mask of the border tiles those borders touch, and the mask of its carrier
+        """
+        self.tiles = tiles
+        self.borders = borders
+        self.lines = lines
+        '''Tiles next to the borders of the group, which are next to the group like the neighbours of its tokens'''
+        self.carrier = carrier
+        self.touched = 0
+        '''Empty tiles next to the group and out of its carrier, set by get_semi_connections'''
+        self.bridged = 0
+        '''Empty tiles out of the carrier and not next to the group sharing two touched tiles with it'''
+
+
+def get_neighbour_count_masks(bitboard: BitBoard, mask: int) -> tuple[int, int]:
+    """
+    Get the masks of the tiles with at least one, and with at least two, neighbours in mask
+    """
+    at_least_one = at_least_two = 0
+    for shift, sources in bitboard.geometry.neighbour_shifts:
+        neighbours = shift_mask(mask & sources, shift)
+        at_least_two |= at_least_one & neighbours
+        at_least_one |= neighbours
+    return at_least_one, at_least_two
+
+
+def get_two_tiles(mask: int) -> int:
+    """
+    Get the mask of the two lowest tiles of mask
+    """
+    first = mask & -mask
+    rest = mask ^ first
+    return first | (rest & -rest)
+
+
+def get_groups(bitboard: BitBoard, player_token: int) -> list[VirtualGroup]:
+    """
+    Get the groups of connected tokens of the player, the tokens touching a border grouped with that border
+    """
+    geometry = bitboard.geometry
+    if player_token == PLAYER_1_TOKEN:
+        start_line, end_line = geometry.left_column, geometry.right_column
+    else:
+        start_line, end_line = geometry.top_row, geometry.bottom_row
+    start, end = VirtualGroup(0, 1, start_line), VirtualGroup(0, 2, end_line)
+    groups = [start, end]
+    remaining = bitboard.tiles[player_token]
+    while remaining != 0:
+        tiles = bitboard.get_connected_tiles(remaining & -remaining, remaining)
+        remaining ^= tiles
+        touching = [group for group, line in ((start, start_line), (end, end_line)) if tiles & line != 0]
+        if len(touching) == 0:
+            groups.append(VirtualGroup(tiles, 0, 0))
+        for group in touching:
+            group.tiles |= tiles
+        if len(touching) == 2:  # the player already won
+            start.borders, start.lines = 3, start_line | end_line
+            groups.remove(end)
+    return groups
+
+
+def get_semi_connections(bitboard: BitBoard, groups: list[VirtualGroup]) -> dict[tuple[int, int], list[int]]:
+    """
+    Get the carriers of the semi connections between every two groups, by group indices
+
+    A semi connection goes through a key tile next to one group and next or bridged to the other one; the player
+    connects the groups by taking the key. The carrier holds the key and the tiles of the bridges
+    """
+    empty = bitboard.get_empty_mask()
+    neighbour_masks = bitboard.geometry.neighbour_masks
+    for group in groups:
+        at_least_one, at_least_two = get_neighbour_count_masks(bitboard, group.tiles)
+        group.touched = (at_least_one | group.lines) & empty & ~group.carrier
+        # Count the touched tiles around every tile, border lines included through the touched tiles themselves
+        _, bridged = get_neighbour_count_masks(bitboard, group.touched)
+        group.bridged = bridged & empty & ~group.touched & ~group.carrier
+
+    semis: dict[tuple[int, int], list[int]] = dict()
+    # Groups every key tile is next or bridged to, with the carrier of the bridge (0 when next to it)
+    links: dict[int, list[tuple[int, int]]] = dict()
+    for index, group in enumerate(groups):
+        for mask, bridged in ((group.touched, False), (group.bridged, True)):
+            while mask != 0:
+                key = mask & -mask
+                mask ^= key
+                carrier = get_two_tiles(neighbour_masks[key.bit_length() - 1] & group.touched) if bridged else 0
+                links.setdefault(key, list()).append((index, carrier))
+    for key, key_links in links.items():
+        for position, (first, first_carrier) in enumerate(key_links):
+            for second, second_carrier in key_links[position + 1:]:
+                carrier = first_carrier | second_carrier | key
+                if first_carrier & second_carrier != 0 or carrier & (groups[first].carrier | groups[second].carrier):
+                    continue
+                semis.setdefault((first, second), list()).append(carrier)
+    return semis
+
+
+def get_full_connection(carriers: list[int]) -> int | None:
+    """
+    Get the carrier of a full connection made of semi connections with the given carriers, None when there is none
+
+    Two semi connections with disjoint carriers make a full one: whichever of them the opponent breaks, the player
+    takes the key of the other one
+    """
+    best: int | None = None
+    for position, first in enumerate(carriers):
+        for second in carriers[position + 1:]:
+            if first & second == 0 and (best is None or (first | second).bit_count() < best.bit_count()):
+                best = first | second
+    return best
+
+
+def get_winning_carriers(bitboard: BitBoard, player_token: int) -> list[int]:
+    """
+    Get the carriers of virtual connections between the borders of the player found by a bounded H-search
+
+    Groups are joined by the full connections found between them as long as the carriers stay disjoint (AND rule), and
+    the semi connections of the joined groups are searched again, at most MAX_ROUNDS times. A carrier is that of a
+    full connection, or of a semi connection won by the player moving first
+    """
+    groups = get_groups(bitboard, player_token)
+    for _ in range(MAX_ROUNDS):
+        if any(group.borders == 3 for group in groups):
+            break
+        roots = list(range(len(groups)))  # index of the group every group was joined into in this round
+        for (first, second), carriers in get_semi_connections(bitboard, groups).items():
+            while roots[first] != first:
+                first = roots[first]
+            while roots[second] != second:
+                second = roots[second]
+            carrier = get_full_connection(carriers)
+            if first == second or carrier is None:
+                continue
+            group, other = groups[first], groups[second]
+            if carrier & (group.carrier | other.carrier) != 0 or group.carrier & other.carrier != 0:
+                continue
+            groups[first] = VirtualGroup(group.tiles | other.tiles, group.borders | other.borders,
+                                         group.lines | other.lines, group.carrier | other.carrier | carrier)
+            roots[second] = first
+        if all(root == index for index, root in enumerate(roots)):
+            break
+        groups = [group for index, group in enumerate(groups) if roots[index] == index]
+
+    carriers = [group.carrier for group in groups if group.borders == 3]
+    if len(carriers) == 0:
+        for (first, second), semi_carriers in get_semi_connections(bitboard, groups).items():
+            group, other = groups[first], groups[second]
+            if group.borders | other.borders == 3 and group.carrier & other.carrier == 0:
+                carriers.extend(carrier | group.carrier | other.carrier for carrier in semi_carriers)
+    return carriers
+
+
+def get_must_play(bitboard: BitBoard, player_token: int) -> int | None:
+    """
+    Get the mask of the empty tiles the player must play one of to stop the virtual wins of the opponent, None when
+    the opponent has none or when no single tile stops them all
+
+    A move out of the carrier of a virtual connection doesn't break it, so every move out of the intersection of the
+    carriers loses
+    """
+    opponent_token = 1 if player_token == 2 else 2
+    must_play = bitboard.get_empty_mask()
+    carriers = get_winning_carriers(bitboard, opponent_token)
+    if len(carriers) == 0:
+        return None
+    for carrier in carriers:
+        must_play &= carrier
+    return must_play if must_play != 0 else None